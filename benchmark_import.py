@@ -0,0 +1,58 @@
+"""Measure the time to import the toolbox in a fresh interpreter, and check it against a target."""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = ("playwright_computer_use.async_api", "playwright_computer_use.sync_api")
+# Only imported on first use, importing them eagerly is a regression.
+DEFERRED_MODULES = ("anthropic", "PIL")
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+print(time.perf_counter() - start)
+print(",".join(m for m in {deferred!r} if m in sys.modules))
+"""
+
+
+def measure(modules: tuple[str, ...]) -> tuple[float, list[str]]:
+    """Seconds to import modules in a new interpreter, and the deferred modules it loaded."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            SCRIPT.format(modules=modules, deferred=DEFERRED_MODULES),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+    return float(output[0]), [module for module in output[1].split(",") if module]
+
+
+def main():
+    """Run the benchmark, exit with an error if the median exceeds the target."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--target", type=float, default=0.5, help="Maximum median, in seconds."
+    )
+    args = parser.parse_args()
+    times = []
+    for _ in range(args.runs):
+        seconds, loaded = measure(MODULES)
+        times.append(seconds)
+    median = statistics.median(times)
+    print(f"import {', '.join(MODULES)}: median {median:.3f}s, max {max(times):.3f}s")
+    if loaded:
+        sys.exit(f"Deferred modules imported eagerly: {', '.join(loaded)}")
+    if median > args.target:
+        sys.exit(f"Import time {median:.3f}s exceeds the target of {args.target}s")
+
+
+if __name__ == "__main__":
+    main()
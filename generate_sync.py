@@ -0,0 +1,76 @@
+"""Generate sync_api.py from async_api.py, so the two APIs cannot drift apart.
+
+The async module is the source: `async def` becomes `def`, awaits are dropped, the
+async Playwright API is replaced by the sync one, and async_backend by sync_backend,
+which holds what the APIs do differently. The result is formatted with ruff. Run it
+after changing async_api.py, or with --check to verify sync_api.py is up to date.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PACKAGE = Path(__file__).parent / "src" / "playwright_computer_use"
+SOURCE = PACKAGE / "async_api.py"
+TARGET = PACKAGE / "sync_api.py"
+
+# Applied in order to the async module.
+SUBSTITUTIONS = [
+    (re.compile(r"\bplaywright\.async_api\b"), "playwright.sync_api"),
+    (
+        re.compile(r"\bplaywright_computer_use\.async_backend\b"),
+        "playwright_computer_use.sync_backend",
+    ),
+    (re.compile(r"\basync def\b"), "def"),
+    (re.compile(r"\basync (with|for)\b"), r"\1"),
+    (re.compile(r"\bawait "), ""),
+    (re.compile(r"\ban Async Playwright\b"), "a Sync Playwright"),
+    (re.compile(r"\bAsync Playwright\b"), "Sync Playwright"),
+]
+
+# Left in the output, a construct the substitutions do not handle.
+FORBIDDEN = re.compile(r"\basyncio\b|\bawait\b|\basync (def|with|for)\b|\bAwaitable\b")
+
+HEADER = "# Generated from async_api.py by generate_sync.py, do not edit.\n"
+
+
+def generate(source: str) -> str:
+    """The sync module for the async module source, formatted."""
+    code = source
+    for pattern, replacement in SUBSTITUTIONS:
+        code = pattern.sub(replacement, code)
+    # Only the summary of the module docstring applies to sync_api.
+    summary_end = code.index("\n")
+    docstring_end = code.index('"""', 3) + 4
+    code = code[:summary_end] + '"""\n\n' + HEADER + code[docstring_end:]
+    for number, line in enumerate(code.split("\n"), 1):
+        if FORBIDDEN.search(line.split("#")[0]):
+            raise ValueError(f"Cannot convert line {number} to sync: {line.strip()}")
+    return subprocess.run(
+        ["ruff", "format", "--stdin-filename", str(TARGET), "-"],
+        input=code,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def main():
+    """Write sync_api.py, or with --check exit with an error if it is out of date."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check", action="store_true", help="Only check sync_api.py is up to date."
+    )
+    args = parser.parse_args()
+    code = generate(SOURCE.read_text())
+    if args.check:
+        if TARGET.read_text() != code:
+            sys.exit(f"{TARGET} is out of date, run generate_sync.py")
+        return
+    TARGET.write_text(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,14 @@ from collections.abc import Callable
 from datetime import datetime
 from typing import cast
 
-
-import httpx
 from anthropic import (
     Anthropic,
-    AnthropicBedrock,
-    AnthropicVertex,
     APIError,
     APIResponseValidationError,
     APIStatusError,
 )
 from playwright.sync_api import Page
+from playwright.async_api import Error as PlaywrightError
 from anthropic.types.beta import (
     BetaCacheControlEphemeralParam,
     BetaMessage,
@@ -28,6 +25,16 @@ from anthropic.types.beta import (
 )
 
 from playwright_computer_use.async_api import PlaywrightToolbox, ToolResult
+from playwright_computer_use.model_routing import ModelRouter
+from playwright_computer_use.rate_limit import (
+    Priority,
+    RateLimiter,
+    estimate_request_tokens,
+)
+from playwright_computer_use.request_body import RequestBodyBuilder
+from playwright_computer_use.stall import StallDetector
+from playwright_computer_use.supervisor import SessionSupervisor
+from playwright_computer_use.usage import SessionUsage, TokenBudget, image_tokens
 
 COMPUTER_USE_BETA_FLAG = {
     "20241022": "computer-use-2024-10-22",
@@ -43,7 +50,7 @@ PROMPT_CACHING_BETA_FLAG = "prompt-caching-2024-07-31"
 # helpful for the task at hand.
 SYSTEM_PROMPT = f"""<SYSTEM_CAPABILITY>
 * You are utilising an firefox browser with internet access. The entirity of the task you are given can be solved by navigating from this web page.
-* You can only use one page, and you can't open new tabs.
+* You can only use one page, and you can't open new tabs, unless you are given a tabs tool.
 * When viewing a page it can be helpful to zoom out so that you can see everything on the page.  Either that, or make sure you scroll down to see everything before deciding something isn't available.
 * When using your computer function calls, they take a while to run and send back to you.  Where possible/feasible, try to chain multiple of these calls all into one function calls request. At the end always ask for a screenshot, to make sure the state of the page is as you expect.
 * The current date is {datetime.today().strftime("%A, %B %-d, %Y")}.
@@ -63,9 +70,45 @@ async def sampling_loop(
     max_tokens: int = 4096,
     enable_prompt_caching: bool = True,
     verbose: bool = False,
+    usage: SessionUsage | None = None,
+    budget: TokenBudget | None = None,
+    model_router: ModelRouter | None = None,
+    stall_detector: StallDetector | None = None,
+    supervisor: SessionSupervisor | None = None,
+    rate_limiter: RateLimiter | None = None,
+    priority: Priority = "interactive",
+    request_builder: RequestBodyBuilder | None = None,
 ):
-    """Agentic sampling loop for the assistant/tool interaction of computer use."""
+    """Agentic sampling loop for the assistant/tool interaction of computer use.
+
+    Pass a SessionUsage to read the tokens used by the session, and a TokenBudget to
+    lower the screenshot quality as the session gets close to it and stop once it is
+    exceeded.
+
+    Pass a ModelRouter to send routine turns to a fast model, escalating to a stronger
+    one when the session struggles; model is then ignored.
+
+    Pass a StallDetector to react to sessions repeating actions on an unchanged
+    screen: hint the model, escalate to the strong model of model_router, or stop (the
+    reason is in `stall_detector.stalls`).
+
+    Pass a SessionSupervisor to checkpoint the session and continue it in a new page
+    when the browser crashes, or to recycle long lived pages.
+
+    Pass a RateLimiter shared by the sessions using the same API key to queue their
+    requests under its rate limits, with the given priority, and retry the requests
+    failing transiently instead of ending the session.
+
+    When the toolbox has a FrameRecorder with a dump_dir, its frames are written there
+    if the session fails.
+
+    Pass a RequestBodyBuilder to serialize the requests incrementally, only the
+    messages that are new or changed since the previous turn are serialized again.
+    """
     assert page is not None, "playwright page must be provided"
+    if model_router is not None:
+        model_router.check_tool_version(tools.beta_version)
+    usage = usage if usage is not None else SessionUsage()
 
     system = BetaTextBlockParam(
         type="text",
@@ -83,7 +126,21 @@ async def sampling_loop(
                         print(
                             f"tool call > {content_block['name']} {content_block['input']}"
                         )
+    if supervisor is not None:
+        await supervisor.start(tools, messages)
     while True:
+        if supervisor is not None:
+            await supervisor.ensure_alive(tools, messages)
+        if budget is not None:
+            if budget.exceeded(usage):
+                return [{"role": "system", "content": system_prompt}] + messages
+            quality = budget.quality(usage)
+            tools.set_image_quality(quality)
+            if quality.max_images is not None:
+                only_n_most_recent_images = min(
+                    only_n_most_recent_images or quality.max_images,
+                    quality.max_images,
+                )
         enable_prompt_caching = False
         betas = [COMPUTER_USE_BETA_FLAG[tools.beta_version]]
         image_truncation_threshold = only_n_most_recent_images or 0
@@ -111,24 +168,39 @@ async def sampling_loop(
             if verbose:
                 sys.stdout.write("Calling Model")
                 sys.stdout.flush()
-            response = anthropic_client.beta.messages.create(
+            request = dict(
                 max_tokens=max_tokens,
                 messages=messages,
-                model=model,
+                model=model_router.select() if model_router else model,
                 system=[system],
                 tools=tools.to_params(),
                 betas=betas,
             )
+            if rate_limiter is not None:
+                estimated_tokens = estimate_request_tokens(
+                    messages, request["system"], request["tools"]
+                )
+                response = await rate_limiter.call(
+                    lambda: _create_message(anthropic_client, request, request_builder),
+                    tokens=estimated_tokens,
+                    priority=priority,
+                )
+                rate_limiter.settle(estimated_tokens, response.usage)
+            else:
+                response = _create_message(anthropic_client, request, request_builder)
             if verbose:
                 sys.stdout.write(
                     "\r\033[K"
                 )  # Move to the beginning of the line and clear it
                 sys.stdout.flush()
         except (APIStatusError, APIResponseValidationError) as e:
+            _dump_frames(tools, repr(e))
             raise e
         except APIError as e:
+            _dump_frames(tools, repr(e))
             return [{"role": "system", "content": system_prompt}] + messages
 
+        usage.add(response.usage)
         response_params = _response_to_params(response)
         messages.append(
             {
@@ -137,26 +209,67 @@ async def sampling_loop(
             }
         )
 
-        tool_result_content: list[BetaToolResultBlockParam] = []
+        tool_result_content: list[BetaToolResultBlockParam | BetaTextBlockParam] = []
+        tools.start_turn()
+        restarted = False
         for content_block in response_params:
             if content_block["type"] == "tool_use":
                 if verbose:
                     print(
                         f"tool call > {content_block['name']} {content_block['input']}"
                     )
-                result = await tools.run_tool(
-                    name=content_block["name"],
-                    input=content_block["input"],
-                    tool_use_id=content_block["id"],
-                )
+                try:
+                    result = await tools.run_tool(
+                        name=content_block["name"],
+                        input=content_block["input"],
+                        tool_use_id=content_block["id"],
+                    )
+                except PlaywrightError as e:
+                    if supervisor is None or not await supervisor.ensure_alive(
+                        tools, messages
+                    ):
+                        _dump_frames(tools, repr(e))
+                        raise
+                    restarted = True
+                    break
                 tool_result_content.append(result)
+                usage.image_tokens += sum(
+                    image_tokens(content["source"]["data"])
+                    for content in result["content"]
+                    if isinstance(content, dict) and content["type"] == "image"
+                )
             if verbose and content_block["type"] == "text":
                 print(f"assistant > {content_block['text']}")
 
+        if restarted:
+            # The session continues from the last checkpoint.
+            continue
+        if model_router is not None:
+            model_router.observe(response_params, tool_result_content)
+        if stall_detector is not None and tool_result_content:
+            stall = stall_detector.observe(response_params, tool_result_content)
+            if stall is not None and stall_detector.policy == "terminate":
+                _dump_frames(tools, f"stalled: {stall.reason}")
+                messages.append({"content": tool_result_content, "role": "user"})
+                return [{"role": "system", "content": system_prompt}] + messages
+            if (
+                stall is not None
+                and stall_detector.policy == "escalate"
+                and model_router
+            ):
+                model_router.escalate(stall.reason)
+            elif stall is not None:
+                tool_result_content.append(
+                    BetaTextBlockParam(
+                        type="text", text=stall_detector.hint_text(stall)
+                    )
+                )
         if not tool_result_content:
             return [{"role": "system", "content": system_prompt}] + messages
 
         messages.append({"content": tool_result_content, "role": "user"})
+        if supervisor is not None:
+            await supervisor.after_turn(tools, messages)
 
 
 def anthropic_to_invariant(
@@ -170,18 +283,25 @@ def anthropic_to_invariant(
         if message["role"] == "user":
             if isinstance(message["content"], list):
                 for sub_message in message["content"]:
+                    if sub_message["type"] == "text":
+                        output.append({"role": "user", "content": sub_message["text"]})
+                        continue
                     assert sub_message["type"] == "tool_result"
                     if sub_message["content"]:
-                        assert len(sub_message["content"]) == 1
-                        assert sub_message["content"][0]["type"] == "image"
-                        output.append(
-                            {
-                                "role": "tool",
-                                "content": "local_base64_img: "
-                                + sub_message["content"][0]["source"]["data"],
-                                "tool_id": sub_message["tool_use_id"],
-                            }
-                        )
+                        for content in sub_message["content"]:
+                            # Text snapshots and images of the same observation
+                            # become separate tool messages.
+                            assert content["type"] in ("text", "image")
+                            output.append(
+                                {
+                                    "role": "tool",
+                                    "content": content["text"]
+                                    if content["type"] == "text"
+                                    else "local_base64_img: "
+                                    + content["source"]["data"],
+                                    "tool_id": sub_message["tool_use_id"],
+                                }
+                            )
                     else:
                         if keep_empty_tool_response and any(
                             [sub_message[k] for k in sub_message]
@@ -223,6 +343,33 @@ def anthropic_to_invariant(
     return output
 
 
+def _create_message(
+    client: Anthropic, request: dict, request_builder: RequestBodyBuilder | None
+) -> BetaMessage:
+    """Send a messages request, with a body from request_builder if there is one."""
+    if request_builder is None:
+        return client.beta.messages.create(**request)
+    params = {key: value for key, value in request.items() if key != "betas"}
+    return client.post(
+        "/v1/messages?beta=true",
+        cast_to=BetaMessage,
+        content=request_builder.build(**params),
+        options={
+            "headers": {
+                **request_builder.headers,
+                "anthropic-beta": ",".join(request["betas"]),
+            }
+        },
+    )
+
+
+def _dump_frames(tools: PlaywrightToolbox, reason: str):
+    """Write the frames of the session's recorder, if it has a dump directory."""
+    if tools.recorder is not None and tools.recorder.dump_dir is not None:
+        path = tools.recorder.dump(reason=reason)
+        print(f"Recorded frames written to {path}", file=sys.stderr)
+
+
 def _maybe_filter_to_n_most_recent_images(
     messages: list[BetaMessageParam],
     images_to_keep: int,
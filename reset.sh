@@ -2,4 +2,4 @@ deactivate
 rm -r venv
 python3 -m venv venv
 source venv/bin/activate
-pip install .
\ No newline at end of file
+pip install ".[demo]"
\ No newline at end of file
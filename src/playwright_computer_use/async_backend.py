@@ -0,0 +1,42 @@
+"""What only the async API can do, sync_api uses sync_backend instead."""
+
+import asyncio
+from collections.abc import Awaitable, Coroutine
+from typing import Any, TypeVar
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+T = TypeVar("T")
+
+
+def require_async(feature: str):
+    """Every feature is available in the async API."""
+
+
+async def with_timeout(awaitable: Awaitable[T], timeout: float | None) -> T:
+    """Await with a timeout, raising Playwright's TimeoutError like a sync call would."""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        # Before Python 3.11, asyncio.TimeoutError is not the builtin TimeoutError.
+        raise PlaywrightTimeoutError(f"Timeout {timeout}s exceeded.") from None
+
+
+async def gather(*awaitables: Awaitable[T]) -> list[T]:
+    """Await concurrently, e.g. to pipeline CDP commands."""
+    return list(await asyncio.gather(*awaitables))
+
+
+class BackgroundTasks:
+    """Run coroutines while the caller goes on, e.g. prefetching while the model thinks."""
+
+    def __init__(self):
+        """Create a new BackgroundTasks."""
+        # Referenced until done, the event loop only keeps weak references to tasks.
+        self.tasks: set[asyncio.Task] = set()
+
+    def start(self, coroutine: Coroutine[Any, Any, Any]):
+        """Schedule coroutine without waiting for it."""
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
@@ -0,0 +1,125 @@
+"""Use the async PlaywrightToolbox from synchronous code, running it on a background event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Coroutine
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from playwright.async_api import Page
+
+from playwright_computer_use.async_api import PlaywrightToolbox
+
+if TYPE_CHECKING:
+    from anthropic.types.beta import BetaToolParam, BetaToolResultBlockParam
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """An event loop running in a daemon thread, for synchronous code to submit coroutines to.
+
+    Async Playwright objects belong to the loop they were created in: create the
+    browser and its pages with `run` or `submit`, e.g. in the page_factory of
+    `BackgroundToolbox`.
+    """
+
+    _shared: BackgroundLoop | None = None
+
+    def __init__(self):
+        """Start a new BackgroundLoop."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="playwright-computer-use", daemon=True
+        )
+        self.thread.start()
+
+    @classmethod
+    def shared(cls) -> BackgroundLoop:
+        """The loop of the process, started on first use."""
+        if cls._shared is None or cls._shared.loop.is_closed():
+            cls._shared = cls()
+        return cls._shared
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> Future[T]:
+        """Schedule coroutine on the loop, returns its future without waiting."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run coroutine on the loop and wait for its result."""
+        return self.submit(coroutine).result()
+
+    def close(self):
+        """Stop the loop and its thread, pending coroutines are cancelled."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class BackgroundToolbox:
+    """Synchronous facade of the async PlaywrightToolbox, whose calls return futures.
+
+    Every session gets the async engine and its features, while the application stays
+    synchronous. The tool calls of a session run in order; the calls of different
+    sessions, even sharing a loop, overlap, e.g.:
+
+        futures = [session.run_tool(**call) for session, call in pending]
+        results = [future.result() for future in futures]
+    """
+
+    def __init__(
+        self,
+        page_factory: Callable[[], Awaitable[Page]],
+        loop: BackgroundLoop | None = None,
+        **options: Any,
+    ):
+        """Create a new BackgroundToolbox.
+
+        Args:
+            page_factory: Creates the async page of the session, run on the loop.
+            loop: Optional, the loop to run on. Default is the shared loop of the process.
+            options: Options of the async PlaywrightToolbox, see `async_api.PlaywrightToolbox`.
+        """
+        self.loop = loop or BackgroundLoop.shared()
+        self.toolbox: PlaywrightToolbox = self.loop.run(
+            self._create(page_factory, options)
+        )
+
+    async def _create(
+        self, page_factory: Callable[[], Awaitable[Page]], options: dict
+    ) -> PlaywrightToolbox:
+        """Create the page and the toolbox on the loop."""
+        self._lock = asyncio.Lock()
+        return PlaywrightToolbox(await page_factory(), **options)
+
+    @property
+    def page(self) -> Page:
+        """The async page of the session, only use it on the loop."""
+        return self.toolbox.page
+
+    def to_params(self) -> list[BetaToolParam]:
+        """Params of the tools, see `async_api.PlaywrightToolbox.to_params`."""
+        return self.toolbox.to_params()
+
+    def run_tool(
+        self, name: str, input: dict, tool_use_id: str
+    ) -> Future[BetaToolResultBlockParam]:
+        """Start running a tool, after the previous calls of the session, returns its future."""
+        return self.loop.submit(self._run_tool(name, input, tool_use_id))
+
+    async def _run_tool(
+        self, name: str, input: dict, tool_use_id: str
+    ) -> BetaToolResultBlockParam:
+        """Run a tool on the loop, one call of the session at a time."""
+        async with self._lock:
+            return await self.toolbox.run_tool(name, input, tool_use_id)
+
+    def start_turn(self):
+        """Start the turn deadline, see `async_api.PlaywrightToolbox.start_turn`."""
+        self.toolbox.start_turn()
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> Future[T]:
+        """Run coroutine on the loop of the session, e.g. to use the page directly."""
+        return self.loop.submit(coroutine)
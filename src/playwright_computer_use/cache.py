@@ -0,0 +1,224 @@
+"""On-disk cache of static assets, shared by the browser contexts of a worker."""
+
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+CACHEABLE_RESOURCE_TYPES = frozenset({"script", "stylesheet", "font", "image"})
+
+# Headers describing the transfer rather than the asset, the stored body is decoded.
+DROPPED_HEADERS = frozenset(
+    {
+        "connection",
+        "content-encoding",
+        "content-length",
+        "keep-alive",
+        "set-cookie",
+        "transfer-encoding",
+    }
+)
+
+
+@dataclass
+class CacheEntry:
+    """Metadata of a cached asset, its body is stored next to it."""
+
+    url: str
+    status: int
+    headers: dict[str, str]
+    stored_at: float
+    size: int
+
+
+def _cache_control(headers: dict[str, str]) -> dict[str, str]:
+    directives = {}
+    for directive in headers.get("cache-control", "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name] = value.strip('"')
+    return directives
+
+
+class AssetCache:
+    """Size bounded on-disk cache of static assets, keyed by URL and revalidated with ETag/Last-Modified.
+
+    Share one instance between the toolboxes of a worker: only asset bodies are shared,
+    cookies and storage stay in each browser context. Least recently used assets are
+    evicted once the cache grows over max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """Create a new AssetCache, reusing the assets already in directory.
+
+        Args:
+            directory: Where to store the assets.
+            max_bytes: Maximum total size of the stored bodies.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        # Key -> body size, least recently used first.
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        bodies = [
+            entry
+            for entry in os.scandir(directory)
+            if entry.name.endswith(".body") and entry.is_file()
+        ]
+        for entry in sorted(bodies, key=lambda entry: entry.stat().st_mtime):
+            key = entry.name.removesuffix(".body")
+            self._index[key] = entry.stat().st_size
+            self._size += self._index[key]
+        self._evict()
+
+    @staticmethod
+    def is_cacheable_request(
+        method: str, resource_type: str, headers: dict[str, str]
+    ) -> bool:
+        """Whether the response to a request may come from the cache."""
+        return (
+            method == "GET"
+            and resource_type in CACHEABLE_RESOURCE_TYPES
+            and "authorization" not in headers
+            and "range" not in headers
+        )
+
+    @staticmethod
+    def is_cacheable_response(status: int, headers: dict[str, str]) -> bool:
+        """Whether a response may be stored and shared between contexts."""
+        directives = _cache_control(headers)
+        return (
+            status == 200
+            and "no-store" not in directives
+            and "private" not in directives
+            and "set-cookie" not in headers
+            # Entries are keyed by URL only, the stored body is decoded so it does
+            # not depend on Accept-Encoding, but it could on any other request header
+            # (e.g. Origin, for CORS headers).
+            and {
+                name.strip()
+                for name in headers.get("vary", "").lower().split(",")
+                if name.strip()
+            }
+            <= {"accept-encoding"}
+        )
+
+    @staticmethod
+    def is_fresh(entry: CacheEntry, now: float | None = None) -> bool:
+        """Whether the entry may be served without revalidation."""
+        directives = _cache_control(entry.headers)
+        if "no-cache" in directives:
+            return False
+        if "immutable" in directives:
+            return True
+        age = (now or time.time()) - entry.stored_at
+        for directive in ("s-maxage", "max-age"):
+            if directives.get(directive, "").isdigit():
+                return age < int(directives[directive])
+        if "expires" in entry.headers:
+            try:
+                expires = email.utils.parsedate_to_datetime(entry.headers["expires"])
+            except (TypeError, ValueError):
+                return False
+            return (now or time.time()) < expires.timestamp()
+        return False
+
+    @staticmethod
+    def validators(entry: CacheEntry) -> dict[str, str]:
+        """Headers of a conditional request revalidating the entry."""
+        headers = {}
+        if "etag" in entry.headers:
+            headers["if-none-match"] = entry.headers["etag"]
+        if "last-modified" in entry.headers:
+            headers["if-modified-since"] = entry.headers["last-modified"]
+        return headers
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        """The cached entry for url, if any, marking it as recently used."""
+        key = self._key(url)
+        try:
+            with open(self._path(key, "meta")) as f:
+                entry = CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        return entry
+
+    def read(self, entry: CacheEntry) -> bytes | None:
+        """The body of the entry, None if it has been evicted meanwhile."""
+        try:
+            with open(self._path(self._key(entry.url), "body"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(
+        self, url: str, status: int, headers: dict[str, str], body: bytes
+    ) -> CacheEntry | None:
+        """Store the response if it is cacheable."""
+        if (
+            not self.is_cacheable_response(status, headers)
+            or len(body) > self.max_bytes
+        ):
+            return None
+        entry = CacheEntry(
+            url=url,
+            status=status,
+            headers={k: v for k, v in headers.items() if k not in DROPPED_HEADERS},
+            stored_at=time.time(),
+            size=len(body),
+        )
+        key = self._key(url)
+        self._write(key, "body", body)
+        self._write(key, "meta", json.dumps(entry.__dict__).encode())
+        with self._lock:
+            self._size += entry.size - self._index.pop(key, 0)
+            self._index[key] = entry.size
+            self._evict()
+        return entry
+
+    def refresh(self, entry: CacheEntry, headers: dict[str, str]) -> CacheEntry:
+        """Update the entry after a 304 Not Modified response."""
+        entry.headers.update(
+            {k: v for k, v in headers.items() if k not in DROPPED_HEADERS}
+        )
+        entry.stored_at = time.time()
+        self._write(self._key(entry.url), "meta", json.dumps(entry.__dict__).encode())
+        return entry
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache fits."""
+        while self._size > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            for suffix in ("body", "meta"):
+                try:
+                    os.remove(self._path(key, suffix))
+                except OSError:
+                    pass
+
+    def _write(self, key: str, suffix: str, data: bytes):
+        """Write atomically, other processes may read the same directory."""
+        path = self._path(key, suffix)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
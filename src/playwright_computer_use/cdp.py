@@ -0,0 +1,215 @@
+"""Chrome DevTools Protocol input events, to dispatch a whole action in one burst."""
+
+from collections.abc import Sequence
+from typing import Literal
+
+MouseButton = Literal["left", "right", "middle"]
+
+MODIFIER_BITS = {"Alt": 1, "Control": 2, "Meta": 4, "Shift": 8}
+BUTTON_BITS: dict[MouseButton, int] = {"left": 1, "right": 2, "middle": 4}
+
+# Playwright key name -> (key, code, windowsVirtualKeyCode, text).
+KEY_DEFINITIONS: dict[str, tuple[str, str, int, str]] = {
+    "Shift": ("Shift", "ShiftLeft", 16, ""),
+    "Control": ("Control", "ControlLeft", 17, ""),
+    "Alt": ("Alt", "AltLeft", 18, ""),
+    "Meta": ("Meta", "MetaLeft", 91, ""),
+    "Enter": ("Enter", "Enter", 13, "\r"),
+    "Tab": ("Tab", "Tab", 9, ""),
+    "Backspace": ("Backspace", "Backspace", 8, ""),
+    "Escape": ("Escape", "Escape", 27, ""),
+    "Delete": ("Delete", "Delete", 46, ""),
+    "Insert": ("Insert", "Insert", 45, ""),
+    "Home": ("Home", "Home", 36, ""),
+    "End": ("End", "End", 35, ""),
+    "PageUp": ("PageUp", "PageUp", 33, ""),
+    "PageDown": ("PageDown", "PageDown", 34, ""),
+    "ArrowLeft": ("ArrowLeft", "ArrowLeft", 37, ""),
+    "ArrowUp": ("ArrowUp", "ArrowUp", 38, ""),
+    "ArrowRight": ("ArrowRight", "ArrowRight", 39, ""),
+    "ArrowDown": ("ArrowDown", "ArrowDown", 40, ""),
+    " ": (" ", "Space", 32, " "),
+    "Space": (" ", "Space", 32, " "),
+    **{f"F{i}": (f"F{i}", f"F{i}", 111 + i, "") for i in range(1, 13)},
+}
+for _code, _char, _keycode in [
+    ("Minus", "-", 189),
+    ("Equal", "=", 187),
+    ("Backquote", "`", 192),
+    ("BracketLeft", "[", 219),
+    ("BracketRight", "]", 221),
+    ("Backslash", "\\", 220),
+    ("Semicolon", ";", 186),
+    ("Quote", "'", 222),
+    ("Comma", ",", 188),
+    ("Period", ".", 190),
+    ("Slash", "/", 191),
+]:
+    KEY_DEFINITIONS[_code] = KEY_DEFINITIONS[_char] = (_char, _code, _keycode, _char)
+for _digit in "0123456789":
+    KEY_DEFINITIONS[_digit] = KEY_DEFINITIONS[f"Digit{_digit}"] = (
+        _digit,
+        f"Digit{_digit}",
+        48 + int(_digit),
+        _digit,
+    )
+for _letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+    KEY_DEFINITIONS[_letter.lower()] = (
+        _letter.lower(),
+        f"Key{_letter}",
+        ord(_letter),
+        _letter.lower(),
+    )
+    KEY_DEFINITIONS[_letter] = KEY_DEFINITIONS[f"Key{_letter}"] = (
+        _letter,
+        f"Key{_letter}",
+        ord(_letter),
+        _letter,
+    )
+
+Event = tuple[str, dict]
+
+
+def modifier_bits(modifiers: list[str]) -> int:
+    """Bit field of the pressed modifiers, as expected by the Input domain."""
+    return sum(MODIFIER_BITS.get(modifier, 0) for modifier in set(modifiers))
+
+
+def button_bits(buttons: Sequence[MouseButton]) -> int:
+    """Bit field of the pressed mouse buttons, as expected by the Input domain."""
+    return sum(BUTTON_BITS[button] for button in set(buttons))
+
+
+def mouse_move_events(x: int, y: int, held: Sequence[MouseButton] = ()) -> list[Event]:
+    """Events moving the mouse to (x, y), dragging if buttons are held (last pressed last)."""
+    return [
+        (
+            "Input.dispatchMouseEvent",
+            {
+                "type": "mouseMoved",
+                "x": x,
+                "y": y,
+                "button": held[-1] if held else "none",
+                "buttons": button_bits(held),
+            },
+        )
+    ]
+
+
+def mouse_button_events(
+    x: int,
+    y: int,
+    button: MouseButton,
+    pressed: bool,
+    modifiers: int = 0,
+    held: Sequence[MouseButton] = (),
+) -> list[Event]:
+    """Events pressing or releasing a mouse button at (x, y), held being the buttons pressed after."""
+    return [
+        (
+            "Input.dispatchMouseEvent",
+            {
+                "type": "mousePressed" if pressed else "mouseReleased",
+                "x": x,
+                "y": y,
+                "button": button,
+                "buttons": button_bits(held),
+                "clickCount": 1,
+                "modifiers": modifiers,
+            },
+        )
+    ]
+
+
+def mouse_click_events(
+    x: int,
+    y: int,
+    button: MouseButton,
+    click_count: int,
+    modifiers: list[str] | None = None,
+    held: Sequence[MouseButton] = (),
+) -> list[Event] | None:
+    """Events moving to (x, y) and clicking, holding the modifiers during the click.
+
+    Returns None if a modifier has no key definition.
+    """
+    modifiers = modifiers or []
+    if any(modifier not in KEY_DEFINITIONS for modifier in modifiers):
+        return None
+    bits = modifier_bits(modifiers)
+    # Buttons held after each event of the click.
+    buttons = {
+        "mousePressed": button_bits([*held, button]),
+        "mouseReleased": button_bits([b for b in held if b != button]),
+    }
+    events = mouse_move_events(x, y, held)
+    events += [_key_event("rawKeyDown", modifier, bits) for modifier in modifiers]
+    for count in range(1, click_count + 1):
+        for event_type in ("mousePressed", "mouseReleased"):
+            events.append(
+                (
+                    "Input.dispatchMouseEvent",
+                    {
+                        "type": event_type,
+                        "x": x,
+                        "y": y,
+                        "button": button,
+                        "buttons": buttons[event_type],
+                        "clickCount": count,
+                        "modifiers": bits,
+                    },
+                )
+            )
+    events += [_key_event("keyUp", modifier, 0) for modifier in reversed(modifiers)]
+    return events
+
+
+def mouse_wheel_events(x: int, y: int, delta_x: int, delta_y: int) -> list[Event]:
+    """Events scrolling with the mouse wheel at (x, y)."""
+    return [
+        (
+            "Input.dispatchMouseEvent",
+            {
+                "type": "mouseWheel",
+                "x": x,
+                "y": y,
+                "deltaX": delta_x,
+                "deltaY": delta_y,
+            },
+        )
+    ]
+
+
+def key_press_events(keys: list[str]) -> list[Event] | None:
+    """Events pressing a chord: the modifiers keys[:-1] are held while keys[-1] is pressed.
+
+    Returns None if a key has no definition, the caller should then fall back to Playwright.
+    """
+    if not keys or any(key not in KEY_DEFINITIONS for key in keys):
+        return None
+    *modifiers, key = keys
+    bits = modifier_bits(modifiers)
+    if "Shift" in modifiers and len(key) == 1:
+        key = key.upper()
+    events = [_key_event("rawKeyDown", modifier, bits) for modifier in modifiers]
+    # Text is only inserted when no modifier other than Shift is held.
+    with_text = not bits & ~MODIFIER_BITS["Shift"]
+    text = KEY_DEFINITIONS[key][3] if with_text else ""
+    events.append(_key_event("keyDown" if text else "rawKeyDown", key, bits))
+    events.append(_key_event("keyUp", key, bits))
+    events += [_key_event("keyUp", modifier, 0) for modifier in reversed(modifiers)]
+    return events
+
+
+def _key_event(event_type: str, key: str, modifiers: int) -> Event:
+    key_value, code, keycode, text = KEY_DEFINITIONS[key]
+    params = {
+        "type": event_type,
+        "key": key_value,
+        "code": code,
+        "windowsVirtualKeyCode": keycode,
+        "modifiers": modifiers,
+    }
+    if event_type == "keyDown" and text:
+        params["text"] = params["unmodifiedText"] = text
+    return ("Input.dispatchKeyEvent", params)
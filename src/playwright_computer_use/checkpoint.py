@@ -0,0 +1,42 @@
+"""Checkpoints of a session, to continue it in a new browser."""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.async_api import StorageState, ViewportSize
+
+
+@dataclass
+class Checkpoint:
+    """State of a session: browser storage, where the page was, and the conversation."""
+
+    url: str
+    # Context storage_state(): cookies and local storage, to create the new context with.
+    storage_state: "StorageState"
+    scroll: tuple[int, int]
+    mouse_position: tuple[int, int]
+    viewport: "ViewportSize | None"
+    # The conversation until the checkpoint, shared with the session (not copied).
+    messages: list = field(default_factory=list)
+    turn: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    def save(self, path: str):
+        """Write the checkpoint to a JSON file, atomically."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        """Read a checkpoint written by `save`."""
+        with open(path) as f:
+            data = json.load(f)
+        data["scroll"] = tuple(data["scroll"])
+        data["mouse_position"] = tuple(data["mouse_position"])
+        return cls(**data)
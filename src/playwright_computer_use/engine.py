@@ -0,0 +1,390 @@
+"""What the sync and async APIs share: action planning, tool results and options."""
+
+from __future__ import annotations
+
+import importlib.resources
+import json
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal, TypedDict, get_args
+
+from playwright_computer_use.cdp import MouseButton
+from playwright_computer_use.keys import to_playwright_chord, to_playwright_keys
+
+if TYPE_CHECKING:
+    from anthropic.types.beta import (
+        BetaImageBlockParam,
+        BetaTextBlockParam,
+        BetaToolResultBlockParam,
+    )
+
+TYPING_DELAY_MS = 12
+SCROLL_MULTIPLIER_FACTOR = 500
+TYPING_GROUP_SIZE = 50
+
+# Limit of the best-effort screenshot attached to a timeout error.
+TIMEOUT_SCREENSHOT_SECONDS = 5
+# The wait action polls the page at this interval, and returns once the page changed
+# and then stayed still, without requests in flight, for WAIT_SETTLE_TIME.
+WAIT_POLL_INTERVAL = 0.25
+WAIT_SETTLE_TIME = 0.5
+# Time the wait action leaves before the deadline, to observe the page.
+WAIT_DEADLINE_MARGIN = 1.0
+
+InputBackend = Literal["playwright", "cdp"]
+
+ImageMediaType = Literal["image/png", "image/jpeg"]
+
+ModelResolution = Literal["XGA", "WXGA", "FWXGA"]
+MODEL_RESOLUTIONS: dict[str, tuple[int, int]] = {
+    "XGA": (1024, 768),
+    "WXGA": (1280, 800),
+    "FWXGA": (1366, 768),
+}
+
+Action_20241022 = Literal[
+    "key",
+    "type",
+    "mouse_move",
+    "left_click",
+    "left_click_drag",
+    "right_click",
+    "middle_click",
+    "double_click",
+    "screenshot",
+    "cursor_position",
+]
+
+Action_20250124 = (
+    Action_20241022
+    | Literal[
+        "left_mouse_down",
+        "left_mouse_up",
+        "scroll",
+        "hold_key",
+        "wait",
+        "triple_click",
+    ]
+)
+
+ScrollDirection = Literal["up", "down", "left", "right"]
+
+ToolVersion = Literal["computer_20241022", "computer_20250124"]
+
+# What a backend does to execute a plan, see `ActionPlan`.
+StepKind = Literal[
+    "move",
+    "click",
+    "down",
+    "up",
+    "scroll",
+    "press",
+    "hold_key",
+    "type",
+    "wait",
+    "screenshot",
+    "cursor_position",
+]
+
+CLICKS_20241022: dict[str, dict] = {
+    "left_click": {"button": "left", "click_count": 1},
+    "right_click": {"button": "right", "click_count": 1},
+    "middle_click": {"button": "middle", "click_count": 1},
+    "double_click": {"button": "left", "click_count": 2, "delay": 100},
+}
+
+CLICKS_20250124: dict[str, dict] = {
+    "left_click": {"button": "left", "click_count": 1},
+    "right_click": {"button": "right", "click_count": 1},
+    "middle_click": {"button": "middle", "click_count": 1},
+    "double_click": {"button": "left", "click_count": 2, "delay": 10},
+    "triple_click": {"button": "left", "click_count": 3, "delay": 10},
+}
+
+
+class ComputerToolOptions(TypedDict):
+    """Options for the computer tool."""
+
+    display_height_px: int
+    display_width_px: int
+    display_number: int | None
+
+
+@dataclass(kw_only=True, frozen=True)
+class ToolResult:
+    """Represents the result of a tool execution."""
+
+    output: str | None = None
+    error: str | None = None
+    base64_image: str | None = None
+    media_type: ImageMediaType = "image/png"
+
+
+class ToolError(Exception):
+    """Raised when a tool encounters an error."""
+
+    def __init__(self, message):
+        """Create a new ToolError."""
+        self.message = message
+
+
+class Deadline:
+    """End of the running action, shared by the tools of a toolbox to bound their calls.
+
+    The tools pass `timeout_ms` to the Playwright calls that accept a timeout, instead
+    of changing the page's default timeout, which belongs to the caller.
+    """
+
+    def __init__(self):
+        """Create a new Deadline, not set."""
+        self.end: float | None = None
+
+    def set(self, seconds: float | None):
+        """End in seconds from now, None clears the deadline."""
+        self.end = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> float | None:
+        """Seconds left, None without deadline."""
+        if self.end is None:
+            return None
+        return max(self.end - time.monotonic(), 0.0)
+
+    def timeout_ms(self) -> float | None:
+        """Timeout of a Playwright call, None keeps the page's default."""
+        remaining = self.remaining()
+        # Playwright reads a timeout of 0 as no timeout.
+        return max(remaining * 1000, 1.0) if remaining is not None else None
+
+
+def chunks(s: str, chunk_size: int) -> list[str]:
+    """Split a string into chunks of a specific size."""
+    return [s[i : i + chunk_size] for i in range(0, len(s), chunk_size)]
+
+
+@dataclass(frozen=True)
+class ActionPlan:
+    """A validated action, in page coordinates, for a backend to execute."""
+
+    kind: StepKind
+    # Where the mouse goes first, None keeps it where it is.
+    position: tuple[int, int] | None = None
+    # Whether the mouse is moved to position, or the step itself moves it (clicks).
+    move: bool = False
+    button: MouseButton = "left"
+    click_count: int = 1
+    delay: float | None = None
+    # Keys held during a click, or pressed together by press.
+    keys: list[str] | None = None
+    # Chord of hold_key, see `to_playwright_chord`.
+    chord: str | None = None
+    delta_x: int = 0
+    delta_y: int = 0
+    # Text typed by type, in chunks.
+    text: list[str] | None = None
+    duration: float | None = None
+
+
+def plan_action(
+    version: ToolVersion,
+    action: str,
+    to_page: Callable[[tuple[int, int]], tuple[int, int]],
+    text: str | None = None,
+    coordinate: tuple[int, int] | None = None,
+    scroll_direction: ScrollDirection | None = None,
+    scroll_amount: int | None = None,
+    duration: int | float | None = None,
+    key: str | None = None,
+) -> ActionPlan:
+    """Validate an action of the computer tool and plan it, raises ToolError if invalid.
+
+    Args:
+        version: The computer tool version the action comes from.
+        action: The action, with the parameters of the tool call.
+        to_page: Maps a coordinate of the model's screen to the page.
+        text: See the computer tool.
+        coordinate: See the computer tool.
+        scroll_direction: See the computer tool.
+        scroll_amount: See the computer tool.
+        duration: See the computer tool.
+        key: See the computer tool.
+    """
+    if version == "computer_20250124":
+        if action in ("left_mouse_down", "left_mouse_up"):
+            if coordinate is not None:
+                raise ToolError(f"coordinate is not accepted for {action=}.")
+            return ActionPlan(kind="down" if action == "left_mouse_down" else "up")
+        if action == "scroll":
+            if scroll_direction is None or scroll_direction not in get_args(
+                ScrollDirection
+            ):
+                raise ToolError(
+                    f"{scroll_direction=} must be 'up', 'down', 'left', or 'right'"
+                )
+            if not isinstance(scroll_amount, int) or scroll_amount < 0:
+                raise ToolError(f"{scroll_amount=} must be a non-negative int")
+            amount = scroll_amount * SCROLL_MULTIPLIER_FACTOR
+            delta_x, delta_y = {
+                "up": (0, -amount),
+                "down": (0, amount),
+                "left": (amount, 0),
+                "right": (-amount, 0),
+            }[scroll_direction]
+            return ActionPlan(
+                kind="scroll",
+                position=to_page(coordinate) if coordinate is not None else None,
+                move=True,
+                delta_x=delta_x,
+                delta_y=delta_y,
+            )
+        if action in ("hold_key", "wait"):
+            if duration is None or not isinstance(duration, (int, float)):
+                raise ToolError(f"{duration=} must be a number")
+            if duration < 0:
+                raise ToolError(f"{duration=} must be non-negative")
+            if duration > 100:
+                raise ToolError(f"{duration=} is too long.")
+            if action == "wait":
+                return ActionPlan(kind="wait", duration=duration)
+            if text is None:
+                raise ToolError(f"text is required for {action}")
+            return ActionPlan(
+                kind="hold_key", chord=to_playwright_chord(text), duration=duration
+            )
+        if action in CLICKS_20250124:
+            if text is not None:
+                raise ToolError(f"text is not accepted for {action}")
+            # The click moves the mouse to the position first.
+            return ActionPlan(
+                kind="click",
+                position=to_page(coordinate) if coordinate is not None else None,
+                keys=to_playwright_keys(key) if key else None,
+                **CLICKS_20250124[action],
+            )
+
+    if action in ("mouse_move", "left_click_drag"):
+        if coordinate is None:
+            raise ToolError(f"coordinate is required for {action}")
+        if text is not None:
+            raise ToolError(f"text is not accepted for {action}")
+        if not isinstance(coordinate, list) or len(coordinate) != 2:
+            raise ToolError(f"{coordinate} must be a tuple of length 2")
+        if not all(isinstance(i, int) and i >= 0 for i in coordinate):
+            raise ToolError(f"{coordinate} must be a tuple of non-negative ints")
+        if action == "left_click_drag":
+            raise NotImplementedError("left_click_drag is not implemented yet")
+        return ActionPlan(kind="move", position=to_page(coordinate), move=True)
+
+    if action in ("key", "type"):
+        if text is None:
+            raise ToolError(f"text is required for {action}")
+        if coordinate is not None:
+            raise ToolError(f"coordinate is not accepted for {action}")
+        if not isinstance(text, str):
+            raise ToolError(f"{text} must be a string")
+        if action == "key":
+            return ActionPlan(kind="press", keys=to_playwright_keys(text))
+        return ActionPlan(kind="type", text=chunks(text, TYPING_GROUP_SIZE))
+
+    if action in (*CLICKS_20241022, "screenshot", "cursor_position"):
+        if text is not None:
+            raise ToolError(f"text is not accepted for {action}")
+        if coordinate is not None:
+            raise ToolError(f"coordinate is not accepted for {action}")
+        if action == "screenshot":
+            return ActionPlan(kind="screenshot")
+        if action == "cursor_position":
+            return ActionPlan(kind="cursor_position")
+        return ActionPlan(kind="click", **CLICKS_20241022[action])
+
+    raise ToolError(f"Invalid action: {action}")
+
+
+def wait_note(waited: float, changed: bool) -> str:
+    """What the wait action observed, for the model."""
+    if changed:
+        return f"Waited {waited:.1f}s, until the page changed and settled."
+    return f"Waited {waited:.1f}s, the page did not change."
+
+
+def load_cursor_image():
+    """Access the cursor.png file in the assets directory."""
+    from PIL import Image
+
+    with importlib.resources.open_binary(
+        "playwright_computer_use.assets", "cursor.png"
+    ) as img_file:
+        image = Image.open(img_file)
+        image.load()  # Ensure the image is fully loaded into memory
+    return image
+
+
+def _timeout_error(
+    name: str, input: dict, timeout: float | None, scope: Literal["action", "turn"]
+) -> str:
+    """JSON error telling the model which action timed out and why."""
+    return json.dumps(
+        {
+            "error": "timeout",
+            "tool": name,
+            "action": input.get("action"),
+            "scope": scope,
+            "timeout": round(timeout, 3) if timeout is not None else None,
+        }
+    )
+
+
+def _make_api_tool_result(
+    result: ToolResult, tool_use_id: str
+) -> BetaToolResultBlockParam:
+    """Convert an agent ToolResult to an API ToolResultBlockParam."""
+    if result.error and result.base64_image:
+        return {
+            "tool_use_id": tool_use_id,
+            "is_error": True,
+            "content": [
+                {"type": "text", "text": result.error},
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": result.media_type,
+                        "data": result.base64_image,
+                    },
+                },
+            ],
+            "type": "tool_result",
+        }
+    if result.error:
+        return {
+            "tool_use_id": tool_use_id,
+            "is_error": True,
+            "content": result.error,
+            "type": "tool_result",
+        }
+    else:
+        tool_result_content: list[BetaTextBlockParam | BetaImageBlockParam] = []
+        if result.output:
+            tool_result_content.append(
+                {
+                    "type": "text",
+                    "text": result.output,
+                }
+            )
+        if result.base64_image:
+            tool_result_content.append(
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": result.media_type,
+                        "data": result.base64_image,
+                    },
+                }
+            )
+        return {
+            "tool_use_id": tool_use_id,
+            "is_error": False,
+            "content": tool_result_content,
+            "type": "tool_result",
+        }
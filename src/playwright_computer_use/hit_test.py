@@ -0,0 +1,113 @@
+"""Describe what a click hit and what it changed, a cheap alternative to a screenshot."""
+
+# Time given to the page to react to a click before its effects are read.
+CLICK_SETTLE_MS = 150
+
+# Shared by the scripts: [role, name, tag, href] of an element, or null.
+_DESCRIBE = """
+    const clean = (s) => (s || "").replace(/\\s+/g, " ").trim().slice(0, maxNameLength);
+    const implicitRole = (el) => {
+        const tag = el.tagName.toLowerCase();
+        if (tag === "a" && el.hasAttribute("href")) return "link";
+        if (tag === "button" || tag === "summary") return "button";
+        if (tag === "select") return "combobox";
+        if (tag === "textarea") return "textbox";
+        if (/^h[1-6]$/.test(tag)) return "heading";
+        if (tag === "img") return "img";
+        if (tag === "input") {
+            const type = (el.getAttribute("type") || "text").toLowerCase();
+            if (["button", "submit", "reset", "image"].includes(type)) return "button";
+            if (["checkbox", "radio"].includes(type)) return type;
+            return "textbox";
+        }
+        if (el.isContentEditable) return "textbox";
+        return "generic";
+    };
+    const describe = (el) => {
+        if (!el || el === document.body || el === document.documentElement) return null;
+        // The interactive ancestor is what the click activates, e.g. a link around an icon.
+        const target = el.closest(
+            "a[href], button, input, select, textarea, summary, label, [role], [onclick]"
+        ) || el;
+        return [
+            target.getAttribute("role") || implicitRole(target),
+            clean(
+                target.getAttribute("aria-label") || target.getAttribute("alt") ||
+                target.getAttribute("title") || target.getAttribute("placeholder") ||
+                target.innerText || target.getAttribute("name") || target.value
+            ),
+            target.tagName.toLowerCase(),
+            target.getAttribute("href"),
+        ];
+    };
+"""
+
+# Before a click at (x, y): returns [element under the point, focused element], and
+# counts the DOM mutations from now on.
+CLICK_WATCH_SCRIPT = (
+    """([x, y, maxNameLength]) => {"""
+    + _DESCRIBE
+    + """
+    const previous = window.__playwrightComputerUseClick;
+    if (previous) previous.observer.disconnect();
+    const watch = { mutations: 0 };
+    watch.observer = new MutationObserver((records) => {
+        watch.mutations += records.length;
+    });
+    watch.observer.observe(document, {
+        subtree: true, childList: true, attributes: true, characterData: true,
+    });
+    window.__playwrightComputerUseClick = watch;
+    return [describe(document.elementFromPoint(x, y)), describe(document.activeElement)];
+}"""
+)
+
+# After the click: returns [focused element, DOM mutations since CLICK_WATCH_SCRIPT],
+# or null if the page was replaced since.
+CLICK_RESULT_SCRIPT = (
+    """(maxNameLength) => {"""
+    + _DESCRIBE
+    + """
+    const watch = window.__playwrightComputerUseClick;
+    if (!watch) return null;
+    watch.observer.disconnect();
+    delete window.__playwrightComputerUseClick;
+    return [describe(document.activeElement), watch.mutations];
+}"""
+)
+
+
+def format_hit(element: list | None) -> str:
+    """Format an element returned by the scripts, e.g. `link "Home" <a href="/">`."""
+    if element is None:
+        return "the page background"
+    role, name, tag, href = element
+    line = f'{role} "{name}"' if name else role
+    return f'{line} <{tag} href="{href}">' if href else f"{line} <{tag}>"
+
+
+def describe_click(
+    before: list | None, after: list | None, url_before: str, url_after: str
+) -> str:
+    """What a click hit and changed, from the results of the scripts and the URLs."""
+    if before is None:
+        lines = ["Clicked, the element under the cursor could not be inspected."]
+    else:
+        lines = [f"Clicked {format_hit(before[0])}."]
+    if url_after != url_before:
+        lines.append(f"The URL changed to {url_after}.")
+    if after is None:
+        if url_after == url_before:
+            lines.append("The page was reloaded or replaced.")
+        return " ".join(lines)
+    focus, mutations = after
+    if before is not None and focus != before[1]:
+        lines.append(
+            f"Focus moved to {format_hit(focus)}." if focus else "Focus was lost."
+        )
+    lines.append(
+        f"The page changed ({mutations} DOM mutations)."
+        if mutations
+        else "The page did not change."
+    )
+    return " ".join(lines)
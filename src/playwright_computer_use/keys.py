@@ -0,0 +1,161 @@
+"""Conversion of the xdotool key names used by Claude into Playwright key names."""
+
+
+def _build_key_table() -> dict[str, str]:
+    """Map lower case xdotool keysyms (and Playwright names) to Playwright key names.
+
+    Only names of Playwright's US keyboard layout, other keys are rejected by its
+    keyboard: there are no F13-F24 or NumpadEqual.
+    """
+    table: dict[str, str] = {}
+    playwright_names = [
+        "Alt",
+        "ArrowDown",
+        "ArrowLeft",
+        "ArrowRight",
+        "ArrowUp",
+        "Backspace",
+        "CapsLock",
+        "ContextMenu",
+        "Control",
+        "Delete",
+        "End",
+        "Enter",
+        "Escape",
+        "Home",
+        "Insert",
+        "Meta",
+        "NumLock",
+        "PageDown",
+        "PageUp",
+        "Pause",
+        "PrintScreen",
+        "ScrollLock",
+        "Shift",
+        "Space",
+        "Tab",
+        *(f"F{i}" for i in range(1, 13)),
+    ]
+    table.update({name.lower(): name for name in playwright_names})
+    aliases = {
+        "Control": ["ctrl", "control_l", "control_r", "ctrl_l", "ctrl_r"],
+        "Shift": ["shift_l", "shift_r"],
+        "Alt": ["alt_l", "alt_r", "option", "mod1"],
+        "Meta": [
+            "super",
+            "super_l",
+            "super_r",
+            "meta_l",
+            "meta_r",
+            "cmd",
+            "command",
+            "win",
+            "windows",
+            "hyper_l",
+            "hyper_r",
+        ],
+        "Enter": ["return", "linefeed"],
+        "Tab": ["iso_left_tab", "kp_tab"],
+        "Backspace": ["back_space"],
+        "Escape": ["esc"],
+        "Delete": ["del"],
+        "Insert": ["ins"],
+        "Home": ["begin"],
+        "PageUp": ["page_up", "prior"],
+        "PageDown": ["page_down", "next"],
+        "ArrowLeft": ["left"],
+        "ArrowRight": ["right"],
+        "ArrowUp": ["up"],
+        "ArrowDown": ["down"],
+        "Space": ["kp_space"],
+        "CapsLock": ["caps_lock"],
+        "NumLock": ["num_lock"],
+        "ScrollLock": ["scroll_lock"],
+        "PrintScreen": ["print", "sys_req"],
+        "ContextMenu": ["menu"],
+        "Pause": ["break"],
+        "NumpadAdd": ["kp_add"],
+        "NumpadSubtract": ["kp_subtract"],
+        "NumpadMultiply": ["kp_multiply"],
+        "NumpadDivide": ["kp_divide"],
+        "NumpadEnter": ["kp_enter"],
+        # Without NumLock, as xdotool names them: the numpad keys move the caret.
+        "NumpadDecimal": ["kp_decimal", "kp_separator", "kp_delete"],
+        "Numpad0": ["kp_0", "kp_insert"],
+        "Numpad1": ["kp_1", "kp_end"],
+        "Numpad2": ["kp_2", "kp_down"],
+        "Numpad3": ["kp_3", "kp_next", "kp_page_down"],
+        "Numpad4": ["kp_4", "kp_left"],
+        "Numpad5": ["kp_5", "kp_begin"],
+        "Numpad6": ["kp_6", "kp_right"],
+        "Numpad7": ["kp_7", "kp_home"],
+        "Numpad8": ["kp_8", "kp_up"],
+        "Numpad9": ["kp_9", "kp_prior", "kp_page_up"],
+        # Punctuation keysyms.
+        "-": ["minus"],
+        "=": ["equal"],
+        "+": ["plus"],
+        ".": ["period"],
+        ",": ["comma"],
+        "/": ["slash"],
+        "\\": ["backslash"],
+        ";": ["semicolon"],
+        ":": ["colon"],
+        "'": ["apostrophe", "quoteright"],
+        '"': ["quotedbl"],
+        "`": ["grave", "quoteleft"],
+        "~": ["asciitilde"],
+        "[": ["bracketleft"],
+        "]": ["bracketright"],
+        "{": ["braceleft"],
+        "}": ["braceright"],
+        "(": ["parenleft"],
+        ")": ["parenright"],
+        "<": ["less"],
+        ">": ["greater"],
+        "!": ["exclam"],
+        "?": ["question"],
+        "@": ["at"],
+        "#": ["numbersign"],
+        "$": ["dollar"],
+        "%": ["percent"],
+        "^": ["asciicircum"],
+        "&": ["ampersand"],
+        "*": ["asterisk"],
+        "_": ["underscore"],
+        "|": ["bar"],
+    }
+    for name, keysyms in aliases.items():
+        table.update({keysym: name for keysym in keysyms})
+    return table
+
+
+XDOTOOL_TO_PLAYWRIGHT_KEYS = _build_key_table()
+
+
+def to_playwright_key(key: str) -> str:
+    """Convert a single xdotool key name to the Playwright key format.
+
+    Single characters and names Playwright already understands (e.g. KeyA, Digit1,
+    Backquote) are returned unchanged.
+    """
+    if len(key) == 1:
+        return key
+    return XDOTOOL_TO_PLAYWRIGHT_KEYS.get(key.lower(), key)
+
+
+def to_playwright_keys(chord: str) -> list[str]:
+    """Convert an xdotool chord, e.g. "ctrl+shift+t", into Playwright keys, e.g. ["Control", "Shift", "T"]."""
+    names = chord.split("+")
+    if chord.endswith("+"):
+        # The chord presses "+" itself, e.g. "ctrl++".
+        names = [*chord[:-1].split("+")[:-1], "+"]
+    keys = [to_playwright_key(name.strip() or name) for name in names]
+    if "Shift" in keys[:-1] and len(keys[-1]) == 1:
+        keys[-1] = keys[-1].upper()
+    return keys
+
+
+def to_playwright_chord(chord: str) -> str:
+    """Convert an xdotool chord into the string accepted by Playwright's keyboard.press."""
+    return "+".join(to_playwright_keys(chord))
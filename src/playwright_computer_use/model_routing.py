@@ -0,0 +1,91 @@
+"""Route the turns of a session between a fast model and a stronger one."""
+
+import json
+from dataclasses import dataclass, field
+
+# Computer use tool version of the models known to support it.
+MODEL_TOOL_VERSIONS: dict[str, str] = {
+    "claude-3-5-sonnet-20241022": "20241022",
+    "claude-3-7-sonnet-20250219": "20250124",
+    "claude-sonnet-4-20250514": "20250124",
+    "claude-opus-4-20250514": "20250124",
+}
+
+LOW_CONFIDENCE_PHRASES = (
+    "i'm not sure",
+    "i am not sure",
+    "not certain",
+    "unclear",
+    "i can't find",
+    "i cannot find",
+    "doesn't seem to",
+    "does not seem to",
+    "didn't work",
+    "did not work",
+    "let me try again",
+    "try a different",
+)
+
+
+@dataclass
+class ModelRouter:
+    """Send turns to fast_model, and escalate to strong_model when the session struggles.
+
+    A turn escalates after a tool error, after the same tool calls were repeated
+    max_repeats times in a row, or when the model's text sounds unsure. The next
+    strong_turns turns then go to strong_model. Both models share the message history,
+    so they must use the same computer use tool version.
+    """
+
+    fast_model: str
+    strong_model: str
+    max_repeats: int = 2
+    strong_turns: int = 3
+    low_confidence_phrases: tuple[str, ...] = LOW_CONFIDENCE_PHRASES
+    escalations: int = field(default=0, init=False)
+    reason: str | None = field(default=None, init=False)
+    _remaining_strong_turns: int = field(default=0, init=False)
+    _last_calls: list[tuple[str, str]] = field(default_factory=list, init=False)
+    _repeats: int = field(default=0, init=False)
+
+    def check_tool_version(self, beta_version: str):
+        """Raise a ValueError if a model does not support the toolbox's tool version."""
+        for model in (self.fast_model, self.strong_model):
+            version = MODEL_TOOL_VERSIONS.get(model)
+            if version is not None and version != beta_version:
+                raise ValueError(
+                    f"{model} uses the {version} computer use tool, the toolbox uses {beta_version}"
+                )
+
+    def select(self) -> str:
+        """The model of the next turn."""
+        return self.strong_model if self._remaining_strong_turns else self.fast_model
+
+    def observe(self, assistant_content: list[dict], tool_results: list[dict]):
+        """Update the routing with the response of a turn and the results of its tool calls."""
+        self._remaining_strong_turns = max(self._remaining_strong_turns - 1, 0)
+        calls = [
+            (block["name"], json.dumps(block["input"], sort_keys=True))
+            for block in assistant_content
+            if block["type"] == "tool_use"
+        ]
+        self._repeats = self._repeats + 1 if calls and calls == self._last_calls else 0
+        self._last_calls = calls
+        text = " ".join(
+            block["text"] for block in assistant_content if block["type"] == "text"
+        ).lower()
+        reason = None
+        if any(result.get("is_error") for result in tool_results):
+            reason = "tool error"
+        elif self._repeats >= self.max_repeats:
+            reason = "repeated actions"
+        elif any(phrase in text for phrase in self.low_confidence_phrases):
+            reason = "low confidence"
+        if reason is not None:
+            self.escalate(reason)
+
+    def escalate(self, reason: str):
+        """Send the next strong_turns turns to strong_model."""
+        self._remaining_strong_turns = self.strong_turns
+        self.escalations += 1
+        self.reason = reason
@@ -0,0 +1,120 @@
+"""Page-side monitor telling whether anything visible changed since the last screenshot."""
+
+from playwright.async_api import Frame as AsyncFrame
+from playwright.async_api import Page as AsyncPage
+from playwright.async_api import Request as AsyncRequest
+from playwright.sync_api import Frame as SyncFrame
+from playwright.sync_api import Page as SyncPage
+from playwright.sync_api import Request as SyncRequest
+
+# Installed in every document of the context. Counts the events that may change what is
+# displayed: DOM mutations, scrolling, focus, input, selection, resources loading,
+# resizes and navigations within the document.
+MONITOR_SCRIPT = """(() => {
+    if (window.__playwrightComputerUse) return;
+    const monitor = {
+        id: Math.random().toString(36).slice(2),
+        version: 0,
+        lastChange: performance.now(),
+    };
+    const touch = () => {
+        monitor.version++;
+        monitor.lastChange = performance.now();
+    };
+    Object.defineProperty(window, "__playwrightComputerUse", { value: monitor });
+    new MutationObserver(touch).observe(document, {
+        subtree: true,
+        childList: true,
+        attributes: true,
+        characterData: true,
+    });
+    for (const type of [
+        "scroll", "input", "change", "focusin", "focusout", "selectionchange",
+        "load", "error", "resize", "pageshow", "hashchange", "popstate",
+        "transitionend", "animationend",
+    ]) {
+        window.addEventListener(type, touch, { capture: true, passive: true });
+    }
+})()"""
+
+# Returns [token, running], or null if the monitor is missing. The token identifies what
+# the page displays. running is true when content changing without events is shown
+# (animations, videos, canvases, frames, GIFs, fonts loading): the token misses it.
+STATE_SCRIPT = """() => {
+    const monitor = window.__playwrightComputerUse;
+    if (!monitor) return null;
+    const running = !document.getAnimations
+        || document.getAnimations().some((a) => a.playState === "running")
+        || [...document.querySelectorAll("video, audio")].some((v) => !v.paused && !v.ended)
+        || document.querySelector(
+            "canvas, iframe, embed, object, animate, animateMotion, animateTransform, img[src*='.gif' i]"
+        ) !== null
+        || document.fonts.status === "loading";
+    return [`${monitor.id}:${monitor.version}:${scrollX},${scrollY}:${location.href}`, running];
+}"""
+
+
+class NetworkActivity:
+    """Requests in flight and main frame navigations of a page, while attached."""
+
+    def __init__(self, page: AsyncPage | SyncPage):
+        """Create a new NetworkActivity, call `attach` to start counting."""
+        self.page = page
+        self.inflight: set[AsyncRequest | SyncRequest] = set()
+        self.started = 0
+        self.navigated = False
+
+    def attach(self):
+        """Start listening to the events of the page."""
+        self.page.on("request", self.on_request)
+        self.page.on("requestfinished", self.on_request_done)
+        self.page.on("requestfailed", self.on_request_done)
+        self.page.on("framenavigated", self.on_navigated)
+
+    def detach(self):
+        """Stop listening to the events of the page."""
+        self.page.remove_listener("request", self.on_request)
+        self.page.remove_listener("requestfinished", self.on_request_done)
+        self.page.remove_listener("requestfailed", self.on_request_done)
+        self.page.remove_listener("framenavigated", self.on_navigated)
+
+    def on_request(self, request: AsyncRequest | SyncRequest):
+        """Count a started request."""
+        self.inflight.add(request)
+        self.started += 1
+
+    def on_request_done(self, request: AsyncRequest | SyncRequest):
+        """Count a finished or failed request."""
+        self.inflight.discard(request)
+
+    def on_navigated(self, frame: AsyncFrame | SyncFrame):
+        """Record a navigation of the main frame."""
+        if frame.parent_frame is None:
+            self.navigated = True
+
+
+class FrameCache:
+    """The last encoded screenshot and the state of the page it shows."""
+
+    def __init__(self):
+        """Create an empty FrameCache."""
+        self.key: tuple | None = None
+        self.frame: str | None = None
+        self.hits = 0
+
+    def get(self, key: tuple | None) -> str | None:
+        """The last frame if it was captured in the same state, None otherwise."""
+        if key is None or key != self.key:
+            return None
+        self.hits += 1
+        return self.frame
+
+    def put(self, key: tuple | None, frame: str):
+        """Remember the frame captured in the state key."""
+        self.key = key
+        self.frame = frame
+
+    def reset(self):
+        """Forget the last frame, e.g. when switching pages."""
+        self.key = None
+        self.frame = None
@@ -0,0 +1,60 @@
+"""Navigation helpers: when a navigation is done, and which URLs are the same page."""
+
+import re
+from typing import Literal
+from urllib.parse import urlsplit, urlunsplit
+
+NavigationWaitUntil = Literal["commit", "domcontentloaded", "load"]
+
+# Seconds to wait for the first meaningful content of a page before observing it anyway.
+FIRST_CONTENT_TIMEOUT = 10
+
+# True once the page shows something: visible text, or a visible media or form element.
+FIRST_CONTENT_SCRIPT = """() => {
+    const body = document.body;
+    if (!body) return false;
+    if (body.innerText.trim().length > 0) return true;
+    return [...body.querySelectorAll("img, svg, video, canvas, input, button")].some((el) => {
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0 && r.top < innerHeight && r.bottom > 0;
+    });
+}"""
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# A scheme, e.g. "https:", "mailto:" or "javascript:", but not a host and port such as
+# "localhost:8080".
+SCHEME_PATTERN = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:(?!\d+(?:[/?#]|$))")
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL typed by the model: scheme added if missing, case and default port removed.
+
+    e.g. "Example.com" -> "https://example.com/".
+    """
+    url = url.strip()
+    if not SCHEME_PATTERN.match(url):
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    if parts.scheme not in DEFAULT_PORTS:
+        return url
+    netloc = (parts.hostname or "").lower()
+    if ":" in netloc:
+        # An IPv6 address, urlsplit drops its brackets.
+        netloc = f"[{netloc}]"
+    try:
+        port = parts.port
+    except ValueError:
+        return url
+    if port is not None and port != DEFAULT_PORTS[parts.scheme]:
+        netloc = f"{netloc}:{port}"
+    if "@" in parts.netloc:
+        netloc = f"{parts.netloc.rpartition('@')[0]}@{netloc}"
+    return urlunsplit(
+        (parts.scheme.lower(), netloc, parts.path or "/", parts.query, parts.fragment)
+    )
+
+
+def is_same_url(url: str, other: str) -> bool:
+    """Whether navigating from other to url would load the same document, at the same fragment."""
+    return normalize_url(url) == normalize_url(other)
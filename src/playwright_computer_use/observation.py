@@ -0,0 +1,183 @@
+"""Text observations of the page, a cheap alternative to screenshots."""
+
+from typing import Literal
+
+ObservationMode = Literal["screenshot", "text", "both"]
+
+CHARS_PER_TOKEN = 4
+MAX_NAME_LENGTH = 80
+
+# Collects the visible interactive elements (and headings, for context) of the main
+# frame. Returns [role, name, value, state, center_x, center_y] per element, the center
+# being the one of the visible part of the element, in viewport coordinates.
+SNAPSHOT_SCRIPT = """(maxNameLength) => {
+    const selector = [
+        "a[href]", "button", "input", "select", "textarea", "summary", "[role]",
+        "[onclick]", "[contenteditable='']", "[contenteditable='true']",
+        "[tabindex]:not([tabindex='-1'])", "h1", "h2", "h3",
+    ].join(",");
+    const implicitRole = (el) => {
+        const tag = el.tagName.toLowerCase();
+        if (tag === "a") return "link";
+        if (tag === "button" || tag === "summary") return "button";
+        if (tag === "select") return "combobox";
+        if (tag === "textarea") return "textbox";
+        if (/^h[1-6]$/.test(tag)) return "heading";
+        if (tag === "input") {
+            const type = (el.getAttribute("type") || "text").toLowerCase();
+            if (["button", "submit", "reset", "image"].includes(type)) return "button";
+            if (["checkbox", "radio", "range", "search"].includes(type)) {
+                return type === "range" ? "slider" : type === "search" ? "searchbox" : type;
+            }
+            return "textbox";
+        }
+        if (el.isContentEditable) return "textbox";
+        return "generic";
+    };
+    const clean = (s) => (s || "").replace(/\\s+/g, " ").trim().slice(0, maxNameLength);
+    const vw = window.innerWidth;
+    const vh = window.innerHeight;
+    const out = [];
+    for (const el of document.querySelectorAll(selector)) {
+        const r = el.getBoundingClientRect();
+        const left = Math.max(r.left, 0), right = Math.min(r.right, vw);
+        const top = Math.max(r.top, 0), bottom = Math.min(r.bottom, vh);
+        if (right - left < 1 || bottom - top < 1) continue;
+        const style = getComputedStyle(el);
+        if (style.visibility === "hidden" || Number(style.opacity) === 0) continue;
+        const x = (left + right) / 2;
+        const y = (top + bottom) / 2;
+        const hit = document.elementFromPoint(x, y);
+        if (hit && hit !== el && !el.contains(hit) && !hit.contains(el)) continue;
+        const role = el.getAttribute("role") || implicitRole(el);
+        const name = clean(
+            el.getAttribute("aria-label") || el.getAttribute("alt") ||
+            el.getAttribute("title") || el.getAttribute("placeholder") ||
+            el.innerText || el.getAttribute("name")
+        );
+        const isField = el.tagName === "INPUT" || el.tagName === "TEXTAREA" ||
+            el.tagName === "SELECT";
+        const value = isField && !["checkbox", "radio"].includes(el.type) ?
+            clean(el.value) : "";
+        const state = [];
+        if (el.checked) state.push("checked");
+        if (el.disabled) state.push("disabled");
+        if (el === document.activeElement) state.push("focused");
+        out.push([role, name, value, state.join(" "), x, y]);
+    }
+    return out;
+}"""
+
+
+def format_element(element: list, scale: tuple[float, float] = (1.0, 1.0)) -> str:
+    """Format an element returned by SNAPSHOT_SCRIPT as a single line of text.
+
+    Args:
+        element: [role, name, value, state, center_x, center_y] of the element.
+        scale: Factors converting the viewport coordinates into the ones used by the model.
+    """
+    role, name, value, state, x, y = element
+    line = f'{role} "{name}"' if name else role
+    if value:
+        line += f' value="{value}"'
+    if state:
+        line += f" [{state}]"
+    return f"{line} @ ({round(x * scale[0])}, {round(y * scale[1])})"
+
+
+class TextSnapshot:
+    """Renders text snapshots of a page, as diffs against what the model already saw."""
+
+    def __init__(self, token_budget: int = 2000):
+        """Create a new TextSnapshot.
+
+        Args:
+            token_budget: Approximate maximum number of tokens of a single snapshot.
+        """
+        self.token_budget = token_budget
+        self.url: str | None = None
+        # Lines the model saw, and all the lines of the last snapshot, including
+        # the ones cut by the token budget.
+        self.known: list[str] = []
+        self.previous: list[str] = []
+
+    def reset(self):
+        """Forget the previous snapshot, the next one will be sent in full."""
+        self.url = None
+        self.known = []
+        self.previous = []
+
+    def render(self, url: str, title: str, lines: list[str]) -> str:
+        """Render the snapshot of the page as a full listing or as a diff."""
+        header = f"Page: {title} ({url})" if title else f"Page: {url}"
+        if url != self.url or not self.known:
+            return self._render_full(url, header, lines)
+        current = set(lines)
+        known = set(self.known)
+        previous = set(self.previous)
+        removed = [line for line in self.known if line not in current]
+        added = [line for line in lines if line not in previous]
+        # Elements already on the page last time, that the token budget cut.
+        unseen = [line for line in lines if line in previous and line not in known]
+        if removed or added:
+            if len(removed) + len(added) >= len(lines):
+                return self._render_full(url, header, lines)
+        elif not unseen:
+            return f"{header}\nNo changes since the last snapshot."
+        self.previous = lines
+
+        diff = [f"- {line}" for line in removed] + [f"+ {line}" for line in added]
+        emitted, omitted = self._fit(header, diff)
+        sent_removed = {line[2:] for line in emitted if line.startswith("- ")}
+        sent_added = [line[2:] for line in emitted if line.startswith("+ ")]
+        self.known = [line for line in self.known if line not in sent_removed]
+        self.known += sent_added
+        text = self._join(
+            f"{header}\nChanges since the last snapshot (- removed, + added):"
+            if diff
+            else f"{header}\nNo changes since the last snapshot.",
+            emitted,
+            omitted,
+        )
+        if unseen and not omitted:
+            # Continue the listing the token budget cut last time.
+            continuation = (
+                f"{text}\nElements not listed yet, continuing the last listing:"
+            )
+            emitted, omitted = self._fit(continuation, unseen)
+            self.known += emitted
+            text = self._join(continuation, emitted, omitted)
+        return text
+
+    def _render_full(self, url: str, header: str, lines: list[str]) -> str:
+        emitted, omitted = self._fit(header, lines)
+        self.url = url
+        self.known = emitted
+        self.previous = lines
+        return self._join(
+            f'{header}\nVisible interactive elements (role "name" @ (x, y)):',
+            emitted,
+            omitted,
+        )
+
+    def _fit(self, header: str, lines: list[str]) -> tuple[list[str], int]:
+        """Keep as many lines as fit in the token budget.
+
+        At least one, even if the header alone exceeds the budget, so that the next
+        snapshots always get further in the listing.
+        """
+        budget = self.token_budget * CHARS_PER_TOKEN - len(header)
+        emitted: list[str] = []
+        for line in lines:
+            budget -= len(line) + 1
+            if budget < 0 and emitted:
+                break
+            emitted.append(line)
+        return emitted, len(lines) - len(emitted)
+
+    @staticmethod
+    def _join(header: str, lines: list[str], omitted: int) -> str:
+        text = "\n".join([header, *lines])
+        if omitted:
+            text += f"\n... {omitted} more elements omitted (token budget reached)"
+        return text
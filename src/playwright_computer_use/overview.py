@@ -0,0 +1,155 @@
+"""Layout of a page overview: a tall region of the page cut in viewport high tiles."""
+
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Longest edge of an overview image, larger images are downscaled by the API anyway.
+OVERVIEW_MAX_SIZE = 1568
+OVERVIEW_MAX_VIEWPORTS = 8
+OVERVIEW_GAP = 16
+
+# [scrollX, scrollY, height of the document].
+DOCUMENT_SIZE_SCRIPT = """() => [
+    Math.round(scrollX),
+    Math.round(scrollY),
+    Math.max(
+        document.documentElement.scrollHeight,
+        document.body ? document.body.scrollHeight : 0,
+    ),
+]"""
+
+
+@dataclass(frozen=True)
+class Tile:
+    """A viewport high slice of the page, and where it is drawn in the overview."""
+
+    page_top: int
+    height: int
+    x: int
+    y: int
+
+
+@dataclass(frozen=True)
+class OverviewLayout:
+    """Tiles of an overview, in overview pixels before scaling."""
+
+    page_width: int
+    top: int
+    tiles: tuple[Tile, ...]
+    columns: int
+    scale: float
+    # Document x of the left edge of the tiles, the horizontal scroll position.
+    left: int = 0
+
+    @property
+    def canvas_size(self) -> tuple[int, int]:
+        """Size of the overview before scaling."""
+        rows = math.ceil(len(self.tiles) / self.columns)
+        height = max(tile.height for tile in self.tiles)
+        return (
+            self.columns * self.page_width + (self.columns - 1) * OVERVIEW_GAP,
+            rows * height + (rows - 1) * OVERVIEW_GAP,
+        )
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Size of the overview image."""
+        width, height = self.canvas_size
+        return max(round(width * self.scale), 1), max(round(height * self.scale), 1)
+
+    def to_document(self, coordinate: tuple[int, int]) -> tuple[int, int] | None:
+        """Map a coordinate of the overview image to the document, None between tiles."""
+        x, y = coordinate[0] / self.scale, coordinate[1] / self.scale
+        for tile in self.tiles:
+            if (
+                tile.x <= x < tile.x + self.page_width
+                and tile.y <= y < tile.y + tile.height
+            ):
+                return int(self.left + x - tile.x), int(tile.page_top + y - tile.y)
+        return None
+
+    def legend(self) -> str:
+        """Where each tile is, for the model."""
+        lines = [
+            f"Overview of the page from y={self.top}, in {len(self.tiles)} tiles read left to right, top to bottom:"
+        ]
+        for index, tile in enumerate(self.tiles, start=1):
+            x0, y0 = round(tile.x * self.scale), round(tile.y * self.scale)
+            x1 = round((tile.x + self.page_width) * self.scale)
+            y1 = round((tile.y + tile.height) * self.scale)
+            lines.append(
+                f"{index}: image ({x0},{y0})-({x1},{y1}) shows page y={tile.page_top}-{tile.page_top + tile.height}"
+            )
+        return "\n".join(lines)
+
+
+def plan_overview(
+    page_width: int,
+    top: int,
+    bottom: int,
+    viewport_height: int,
+    max_size: int = OVERVIEW_MAX_SIZE,
+    left: int = 0,
+) -> OverviewLayout:
+    """Cut the page between top and bottom in tiles, arranged to be as legible as possible.
+
+    The tiles are page_width wide from the document x left, e.g. the scroll position.
+    """
+    segments = [
+        (y, min(viewport_height, bottom - y))
+        for y in range(top, max(bottom, top + 1), viewport_height)
+    ]
+    best = (1, 0.0)
+    for columns in range(1, len(segments) + 1):
+        rows = math.ceil(len(segments) / columns)
+        width = columns * page_width + (columns - 1) * OVERVIEW_GAP
+        height = rows * viewport_height + (rows - 1) * OVERVIEW_GAP
+        scale = min(max_size / width, max_size / height, 1.0)
+        if scale > best[1]:
+            best = (columns, scale)
+    columns, scale = best
+    tiles = tuple(
+        Tile(
+            page_top=page_top,
+            height=height,
+            x=(index % columns) * (page_width + OVERVIEW_GAP),
+            y=(index // columns) * (viewport_height + OVERVIEW_GAP),
+        )
+        for index, (page_top, height) in enumerate(segments)
+    )
+    return OverviewLayout(
+        page_width=page_width,
+        top=top,
+        tiles=tiles,
+        columns=columns,
+        scale=scale,
+        left=left,
+    )
+
+
+def render_overview(region: "Image.Image", layout: OverviewLayout) -> "Image.Image":
+    """Draw the tiles of region, a screenshot of the page from layout.top, with their numbers."""
+    from PIL import Image, ImageDraw
+
+    canvas = Image.new("RGB", layout.canvas_size, (128, 128, 128))
+    for tile in layout.tiles:
+        top = tile.page_top - layout.top
+        crop = region.crop((0, top, layout.page_width, top + tile.height))
+        canvas.paste(crop, (tile.x, tile.y))
+    overview = (
+        canvas
+        if layout.scale == 1.0
+        else canvas.resize(layout.size, Image.Resampling.LANCZOS)
+    )
+    draw = ImageDraw.Draw(overview)
+    for index, tile in enumerate(layout.tiles, start=1):
+        x, y = round(tile.x * layout.scale), round(tile.y * layout.scale)
+        label = f" {index} "
+        box = draw.textbbox((x, y), label)
+        draw.rectangle(box, fill=(255, 0, 0))
+        draw.text((x, y), label, fill=(255, 255, 255))
+    return overview
@@ -0,0 +1,321 @@
+"""Share the API rate limits of one key between the sessions of a process, or of several."""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Literal, TypeVar
+
+from anthropic import APIConnectionError, APIStatusError
+
+from playwright_computer_use.usage import image_tokens
+
+Priority = Literal["interactive", "batch"]
+
+# Lower goes first.
+PRIORITY_RANK: dict[Priority, int] = {"interactive": 0, "batch": 1}
+
+# Status codes worth retrying: rate limited, and overloaded or failing servers.
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+
+# Rough number of characters per text token, to estimate requests before sending.
+CHARS_PER_TOKEN = 4
+
+# Longest sleep between two checks of the queue.
+QUEUE_POLL_INTERVAL = 0.05
+
+T = TypeVar("T")
+
+
+def estimate_request_tokens(
+    messages: list, system: Any = None, tools: Any = None
+) -> int:
+    """Approximate number of input tokens of a request, counting images from their size."""
+    images = 0
+
+    def strip_images(value: Any) -> Any:
+        nonlocal images
+        if isinstance(value, dict):
+            if value.get("type") == "image" and "source" in value:
+                images += image_tokens(value["source"]["data"])
+                return None
+            return {key: strip_images(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [strip_images(item) for item in value]
+        return value
+
+    text = json.dumps(strip_images([messages, system, tools]), default=str)
+    return images + math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class QueueStats:
+    """Time the requests of a priority class waited for the rate limits."""
+
+    requests: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        """Average wait of a request, in seconds."""
+        return self.total_wait / self.requests if self.requests else 0.0
+
+    def add(self, wait: float):
+        """Record the wait of a request."""
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class TokenBucket:
+    """Allows per_minute units a minute, refilled continuously, with bursts up to a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        """Create a new, full, TokenBucket."""
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.time()
+
+    def refill(self, now: float):
+        """Add what was refilled since the last update."""
+        elapsed = max(now - self.updated, 0.0)
+        self.level = min(self.capacity, self.level + elapsed * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available, after a refill."""
+        # Requests larger than the bucket go through once it is full.
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) * 60 / self.capacity
+
+    def state(self) -> list[float]:
+        """Level and update time, to share the bucket through a file."""
+        return [self.level, self.updated]
+
+    def load(self, state: list[float]):
+        """Continue from the state of another process."""
+        self.level, self.updated = state
+
+
+class RateLimiter:
+    """Schedule the API requests of many sessions under one key's rate limits.
+
+    Requests wait in a queue until both the requests per minute and the input tokens
+    per minute allow them, interactive sessions before batch ones. Input tokens are
+    estimated before sending and corrected with the usage of the response. Rate limit,
+    overload and connection errors are retried with jittered exponential backoff,
+    honoring the retry-after header; a rate limit error pauses the whole queue, so
+    sessions stop bursting into the limit together.
+
+    Share one RateLimiter between the sessions of a process. With state_path, the
+    buckets are also shared through a locked file with the processes using the same
+    path (POSIX only); priorities then only apply within a process.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        input_tokens_per_minute: float | None = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        state_path: str | None = None,
+    ):
+        """Create a new RateLimiter.
+
+        Args:
+            requests_per_minute: Optional, requests allowed per minute.
+            input_tokens_per_minute: Optional, input tokens allowed per minute.
+            max_retries: Maximum number of retries of a request, the error is raised after.
+            base_delay: Delay before the first retry without retry-after, doubled at each retry.
+            max_delay: Maximum delay between two attempts.
+            state_path: Optional, file the limits are shared through with other processes.
+        """
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = (
+            TokenBucket(input_tokens_per_minute) if input_tokens_per_minute else None
+        )
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state_path = state_path
+        # No request is sent before, set after a rate limit error.
+        self.paused_until = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+        self.queue_stats: dict[Priority, QueueStats] = {
+            priority: QueueStats() for priority in PRIORITY_RANK
+        }
+        self._lock = threading.Lock()
+        self._queue: list[tuple[int, int]] = []
+        self._counter = itertools.count()
+
+    @contextmanager
+    def _shared_state(self) -> Iterator[None]:
+        """Hold the lock of the buckets, loading and saving them when shared."""
+        with self._lock:
+            if self.state_path is None:
+                yield
+                return
+            import fcntl
+
+            with open(self.state_path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    content = f.read()
+                    if content:
+                        state = json.loads(content)
+                        if self.requests is not None and "requests" in state:
+                            self.requests.load(state["requests"])
+                        if self.tokens is not None and "tokens" in state:
+                            self.tokens.load(state["tokens"])
+                        self.paused_until = max(
+                            self.paused_until, state.get("paused_until", 0.0)
+                        )
+                    yield
+                    state = {"paused_until": self.paused_until}
+                    if self.requests is not None:
+                        state["requests"] = self.requests.state()
+                    if self.tokens is not None:
+                        state["tokens"] = self.tokens.state()
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _try_take(self, ticket: tuple[int, int], tokens: int) -> float:
+        """Take the limits for a request if it is first in the queue, returns the wait otherwise."""
+        with self._shared_state():
+            if self._queue[0] != ticket:
+                return QUEUE_POLL_INTERVAL
+            now = time.time()
+            wait = max(self.paused_until - now, 0.0)
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_time(amount))
+            if wait > 0:
+                return wait
+            if self.requests is not None:
+                self.requests.level -= 1
+            if self.tokens is not None:
+                self.tokens.level -= tokens
+            heapq.heappop(self._queue)
+            return 0.0
+
+    async def acquire(self, tokens: int = 0, priority: Priority = "interactive"):
+        """Wait until a request of tokens input tokens can be sent, and count it."""
+        ticket = (PRIORITY_RANK[priority], next(self._counter))
+        with self._lock:
+            heapq.heappush(self._queue, ticket)
+        start = time.monotonic()
+        try:
+            while wait := self._try_take(ticket, tokens):
+                await asyncio.sleep(min(wait, QUEUE_POLL_INTERVAL))
+        except BaseException:
+            with self._lock:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+            raise
+        self.queue_stats[priority].add(time.monotonic() - start)
+
+    def settle(self, estimated_tokens: int, usage: Any):
+        """Correct the tokens taken for a request with the usage of its response."""
+        if self.tokens is None:
+            return
+        actual = (getattr(usage, "input_tokens", 0) or 0) + (
+            getattr(usage, "cache_creation_input_tokens", 0) or 0
+        )
+        with self._shared_state():
+            self.tokens.refill(time.time())
+            self.tokens.level = min(
+                self.tokens.level + estimated_tokens - actual, self.tokens.capacity
+            )
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Delay before retrying, retry_after if the API gave one, jittered otherwise."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.base_delay * 2**attempt, self.max_delay))
+
+    def pause(self, delay: float):
+        """Hold every request of the queue for delay seconds."""
+        with self._shared_state():
+            self.paused_until = max(self.paused_until, time.time() + delay)
+
+    async def call(
+        self,
+        create: Callable[[], T],
+        tokens: int = 0,
+        priority: Priority = "interactive",
+    ) -> T:
+        """Send a request once the limits allow it, retrying transient errors.
+
+        create sends the request, e.g. a call to `client.beta.messages.create`. It runs
+        in a thread, so the sessions of an event loop keep running meanwhile. Create the
+        client with max_retries=0 so retries go through the queue as well.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(tokens, priority)
+            try:
+                return await asyncio.to_thread(create)
+            except (APIStatusError, APIConnectionError) as e:
+                status = e.status_code if isinstance(e, APIStatusError) else None
+                if attempt >= self.max_retries or (
+                    status is not None and status not in RETRYABLE_STATUS_CODES
+                ):
+                    raise
+                delay = self.backoff(attempt, _retry_after(e))
+                self.retries += 1
+                if status == 429:
+                    self.rate_limited += 1
+                    self.pause(delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def metrics(self) -> dict:
+        """Queue waits per priority, and retries, e.g. to tune the limits."""
+        return {
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "queued": len(self._queue),
+            "queue_wait": {
+                priority: {
+                    "requests": stats.requests,
+                    "mean": stats.mean_wait,
+                    "max": stats.max_wait,
+                }
+                for priority, stats in self.queue_stats.items()
+            },
+        }
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Seconds the API asked to wait before retrying, if it did."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
@@ -0,0 +1,164 @@
+"""Keep the last observations of a session in memory, to write them out when it fails."""
+
+import base64
+import io
+import json
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.async_api import ViewportSize
+
+# Radius of the cursor marker drawn on dumped frames.
+CURSOR_MARKER_RADIUS = 8
+
+
+@dataclass
+class Frame:
+    """An action of a session, and what it showed."""
+
+    index: int
+    tool: str
+    input: dict
+    url: str
+    # Mouse position after the action, in page coordinates.
+    cursor: tuple[int, int]
+    viewport: "ViewportSize | None"
+    output: str | None = None
+    error: str | None = None
+    # Screenshot as sent to the model, still compressed.
+    image: bytes | None = field(default=None, repr=False)
+    media_type: str = "image/png"
+    timestamp: float = field(default_factory=time.time)
+
+
+class FrameRecorder:
+    """Rolling record of the last actions of a session and their screenshots.
+
+    Screenshots are kept as the compressed bytes sent to the model, so recording only
+    costs a base64 decode per action. The ring holds at most max_frames frames and
+    max_bytes of images, the oldest are dropped first. Nothing is written to disk
+    until `dump` is called, which `sampling_loop` does when the session fails if
+    dump_dir is set.
+    """
+
+    def __init__(
+        self,
+        max_frames: int = 30,
+        max_bytes: int | None = 32 * 1024 * 1024,
+        dump_dir: str | None = None,
+    ):
+        """Create a new FrameRecorder.
+
+        Args:
+            max_frames: Number of actions kept.
+            max_bytes: Optional, maximum size of the screenshots kept.
+            dump_dir: Optional, directory the frames are dumped to when the session fails.
+        """
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.dump_dir = dump_dir
+        self.frames: deque[Frame] = deque(maxlen=max_frames)
+        self.size = 0
+        self.recorded = 0
+
+    def record(
+        self,
+        tool: str,
+        input: dict,
+        output: str | None,
+        error: str | None,
+        base64_image: str | None,
+        media_type: str,
+        url: str,
+        cursor: tuple[int, int],
+        viewport: "ViewportSize | None",
+    ):
+        """Add the result of an action, dropping the oldest frames if needed."""
+        image = base64.b64decode(base64_image) if base64_image is not None else None
+        if len(self.frames) == self.max_frames:
+            self._drop_oldest()
+        frame = Frame(
+            index=self.recorded,
+            tool=tool,
+            input=input,
+            url=url,
+            cursor=cursor,
+            viewport=viewport,
+            output=output,
+            error=error,
+            image=image,
+            media_type=media_type,
+        )
+        self.frames.append(frame)
+        self.recorded += 1
+        self.size += len(image or b"")
+        while self.max_bytes is not None and self.size > self.max_bytes:
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        """Forget the oldest frame."""
+        frame = self.frames.popleft()
+        self.size -= len(frame.image or b"")
+
+    def clear(self):
+        """Forget every frame."""
+        self.frames.clear()
+        self.size = 0
+
+    def dump(self, directory: str | None = None, reason: str | None = None) -> str:
+        """Write the frames to a new directory, returns its path.
+
+        The directory holds one image per frame, with the cursor marked, and
+        frames.jsonl with the action of each frame.
+        """
+        directory = directory or self.dump_dir
+        if directory is None:
+            raise ValueError("No directory to dump the frames to")
+        path = os.path.join(directory, time.strftime("session-%Y%m%d-%H%M%S"))
+        suffix = 0
+        while os.path.exists(path if not suffix else f"{path}-{suffix}"):
+            suffix += 1
+        path = path if not suffix else f"{path}-{suffix}"
+        os.makedirs(path)
+        with open(os.path.join(path, "frames.jsonl"), "w") as f:
+            if reason is not None:
+                f.write(json.dumps({"reason": reason}) + "\n")
+            for frame in self.frames:
+                annotation = asdict(frame)
+                annotation.pop("image")
+                if frame.image is not None:
+                    extension = "jpg" if frame.media_type == "image/jpeg" else "png"
+                    annotation["file"] = f"{frame.index:05d}.{extension}"
+                    with open(os.path.join(path, annotation["file"]), "wb") as image:
+                        image.write(_mark_cursor(frame))
+                f.write(json.dumps(annotation, default=str) + "\n")
+        return path
+
+
+def _mark_cursor(frame: Frame) -> bytes:
+    """The screenshot of frame with a marker on the cursor."""
+    from PIL import Image, ImageDraw
+
+    image = Image.open(io.BytesIO(frame.image or b"")).convert("RGB")
+    # The model resolution may not have the aspect ratio of the viewport.
+    scale_x = image.width / frame.viewport["width"] if frame.viewport else 1.0
+    scale_y = image.height / frame.viewport["height"] if frame.viewport else 1.0
+    x, y = frame.cursor[0] * scale_x, frame.cursor[1] * scale_y
+    draw = ImageDraw.Draw(image)
+    draw.ellipse(
+        (
+            x - CURSOR_MARKER_RADIUS,
+            y - CURSOR_MARKER_RADIUS,
+            x + CURSOR_MARKER_RADIUS,
+            y + CURSOR_MARKER_RADIUS,
+        ),
+        outline=(255, 0, 0),
+        width=3,
+    )
+    buffered = io.BytesIO()
+    image.save(buffered, format="JPEG" if frame.media_type == "image/jpeg" else "PNG")
+    return buffered.getvalue()
@@ -0,0 +1,125 @@
+"""Build the JSON body of messages requests incrementally, reusing what earlier turns serialized."""
+
+import gzip
+import json
+from dataclasses import dataclass
+from typing import Any
+
+
+def _dumps(value: Any) -> bytes:
+    """Compact JSON, as sent to the API."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+# Closes the objects of a dict or list in `_identity`.
+_END = object()
+
+
+def _identity(value: Any) -> list:
+    """Every object of value, in order: two values with identical objects serialize the same.
+
+    Walking the structure of a message touches a few dozen objects, while serializing
+    it copies its base64 screenshots. Containers are closed by _END, so an object
+    moved into or out of one changes the identity.
+    """
+    objects = [value]
+    if isinstance(value, dict):
+        for key, item in value.items():
+            objects.append(key)
+            objects += _identity(item)
+        objects.append(_END)
+    elif isinstance(value, list):
+        for item in value:
+            objects += _identity(item)
+        objects.append(_END)
+    return objects
+
+
+@dataclass
+class _Fragment:
+    """Serialized message, valid while the message holds the same objects."""
+
+    identity: list
+    data: bytes
+    # A gzip member of data, see `RequestBodyBuilder.compress_level`.
+    compressed: bytes | None = None
+
+    def matches(self, identity: list) -> bool:
+        """Whether the message still holds the objects it was serialized from."""
+        return len(identity) == len(self.identity) and all(
+            a is b for a, b in zip(identity, self.identity)
+        )
+
+
+class RequestBodyBuilder:
+    """Serialize the bodies of the requests of a session, caching the JSON of each message.
+
+    The history only grows, apart from the blocks `sampling_loop` edits (old screenshots
+    removed, cache breakpoints moved). A message is serialized again only when it is
+    new, or when one of its objects was replaced or added; other messages reuse their
+    cached JSON. Messages are checked by identity, so edit them by replacing values,
+    as the loop does, not by mutating strings in place (they are immutable anyway).
+
+    With compress_level, bodies are gzip encoded. Each message is compressed once, as
+    its own gzip member, and the body is their concatenation, which decompresses as a
+    single stream. Only enable it with an endpoint accepting gzip encoded requests.
+    """
+
+    def __init__(self, compress_level: int | None = None):
+        """Create a new RequestBodyBuilder.
+
+        Args:
+            compress_level: Optional, gzip level of the bodies. Default sends plain JSON.
+        """
+        self.compress_level = compress_level
+        self._fragments: dict[int, tuple[Any, _Fragment]] = {}
+        self._separator = self._compress(b",") if compress_level is not None else b""
+        self.serialized = 0
+        self.reused = 0
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Headers describing the bodies."""
+        headers = {"Content-Type": "application/json"}
+        if self.compress_level is not None:
+            headers["Content-Encoding"] = "gzip"
+        return headers
+
+    def build(self, messages: list, **params: Any) -> bytes:
+        """The body of a request with messages and the other params, e.g. model, system, tools."""
+        fragments = [self._fragment(message) for message in messages]
+        # Forget the messages that are no longer sent, e.g. after a restart.
+        alive = {id(message) for message in messages}
+        for key in [key for key in self._fragments if key not in alive]:
+            del self._fragments[key]
+        head = _dumps(params)[:-1] + (b',"messages":[' if params else b'"messages":[')
+        tail = b"]}"
+        if self.compress_level is None:
+            return head + b",".join(fragment.data for fragment in fragments) + tail
+        parts = [self._compress(head)]
+        for index, fragment in enumerate(fragments):
+            if fragment.compressed is None:
+                fragment.compressed = self._compress(fragment.data)
+            if index:
+                parts.append(self._separator)
+            parts.append(fragment.compressed)
+        parts.append(self._compress(tail))
+        return b"".join(parts)
+
+    def _fragment(self, message: Any) -> _Fragment:
+        """The serialized message, from the cache if it did not change."""
+        identity = _identity(message)
+        cached = self._fragments.get(id(message))
+        if cached is not None and cached[0] is message and cached[1].matches(identity):
+            self.reused += 1
+            return cached[1]
+        fragment = _Fragment(identity=identity, data=_dumps(message))
+        # Holding the message keeps its id from being reused by another one.
+        self._fragments[id(message)] = (message, fragment)
+        self.serialized += 1
+        return fragment
+
+    def _compress(self, data: bytes) -> bytes:
+        """A gzip member of data."""
+        level = 9 if self.compress_level is None else self.compress_level
+        return gzip.compress(data, compresslevel=level, mtime=0)
@@ -0,0 +1,153 @@
+"""Routing profiles, to block or stub the requests an agent does not need."""
+
+import base64
+from dataclasses import dataclass, field
+from typing import Literal
+from urllib.parse import urlsplit, urlunsplit
+
+RoutingDecision = Literal["block", "stub", "cap", "continue"]
+HarMode = Literal["record", "replay"]
+
+# Served instead of images larger than the profile allows: a transparent 1x1 GIF.
+PLACEHOLDER_GIF = base64.b64decode(
+    "R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+)
+
+AD_DOMAINS = frozenset(
+    {
+        "adnxs.com",
+        "adsrvr.org",
+        "adservice.google.com",
+        "amazon-adsystem.com",
+        "criteo.com",
+        "criteo.net",
+        "doubleclick.net",
+        "googleadservices.com",
+        "googlesyndication.com",
+        "moatads.com",
+        "outbrain.com",
+        "pubmatic.com",
+        "rubiconproject.com",
+        "scorecardresearch.com",
+        "taboola.com",
+    }
+)
+
+TRACKER_SCRIPT_DOMAINS = frozenset(
+    {
+        "clarity.ms",
+        "connect.facebook.net",
+        "fullstory.com",
+        "google-analytics.com",
+        "googletagmanager.com",
+        "hotjar.com",
+        "mixpanel.com",
+        "newrelic.com",
+        "nr-data.net",
+        "optimizely.com",
+        "segment.com",
+        "segment.io",
+    }
+)
+
+
+def matches_domain(host: str, domains: frozenset[str]) -> bool:
+    """Whether host is one of the domains or one of their subdomains."""
+    host = host.lower()
+    while host:
+        if host in domains:
+            return True
+        _, _, host = host.partition(".")
+    return False
+
+
+@dataclass(frozen=True)
+class RoutingProfile:
+    """Declarative description of the requests to block, stub or cap."""
+
+    name: str
+    block_resource_types: frozenset[str] = frozenset()
+    block_domains: frozenset[str] = frozenset()
+    stub_script_domains: frozenset[str] = frozenset()
+    max_image_bytes: int | None = None
+
+    def decide(self, url: str, resource_type: str) -> RoutingDecision:
+        """Decide what to do with a request."""
+        host = urlsplit(url).hostname or ""
+        if resource_type in self.block_resource_types:
+            return "block"
+        if matches_domain(host, self.block_domains):
+            return "block"
+        if resource_type == "script" and matches_domain(host, self.stub_script_domains):
+            return "stub"
+        if resource_type == "image" and self.max_image_bytes is not None:
+            return "cap"
+        return "continue"
+
+
+@dataclass
+class RoutingStats:
+    """Counters of what a routing profile saved."""
+
+    blocked_requests: int = 0
+    blocked_by_type: dict[str, int] = field(default_factory=dict)
+    stubbed_scripts: int = 0
+    capped_images: int = 0
+    # Only counts the bodies we have seen, the size of blocked requests is unknown.
+    bytes_saved: int = 0
+
+    def record_block(self, resource_type: str):
+        """Count a blocked request."""
+        self.blocked_requests += 1
+        self.blocked_by_type[resource_type] = (
+            self.blocked_by_type.get(resource_type, 0) + 1
+        )
+
+
+ROUTING_PROFILES: dict[str, RoutingProfile] = {
+    # Drops what never helps an agent: ads, trackers, web fonts and media.
+    "lean": RoutingProfile(
+        name="lean",
+        block_resource_types=frozenset({"font", "media"}),
+        block_domains=AD_DOMAINS,
+        stub_script_domains=TRACKER_SCRIPT_DOMAINS,
+    ),
+    # Also replaces large images by a placeholder, for text heavy tasks.
+    "light": RoutingProfile(
+        name="light",
+        block_resource_types=frozenset({"font", "media"}),
+        block_domains=AD_DOMAINS,
+        stub_script_domains=TRACKER_SCRIPT_DOMAINS,
+        max_image_bytes=200_000,
+    ),
+    # Blocks images altogether, for text observations.
+    "text": RoutingProfile(
+        name="text",
+        block_resource_types=frozenset({"font", "media", "image"}),
+        block_domains=AD_DOMAINS,
+        stub_script_domains=TRACKER_SCRIPT_DOMAINS,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class HarOptions:
+    """Record the network traffic of a session to a HAR file, or replay it offline."""
+
+    path: str
+    mode: HarMode = "replay"
+    # When replaying, requests missing from the HAR either fail, or are sent to
+    # passthrough_origin if set (e.g. a local server), else to the network.
+    not_found: Literal["fail", "passthrough"] = "fail"
+    passthrough_origin: str | None = None
+    # Only record or replay the requests matching this glob.
+    url_filter: str | None = None
+
+
+def rewrite_origin(url: str, origin: str) -> str:
+    """Send url to another origin, keeping its path and query."""
+    parts = urlsplit(url)
+    target = urlsplit(origin)
+    return urlunsplit(
+        (target.scheme, target.netloc, parts.path, parts.query, parts.fragment)
+    )
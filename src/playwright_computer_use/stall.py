@@ -0,0 +1,105 @@
+"""Detect sessions repeating the same actions on an unchanged screen."""
+
+import hashlib
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Literal
+
+StallPolicy = Literal["hint", "escalate", "terminate"]
+
+STALL_HINT = (
+    "You seem to be stuck: {reason}. The screen is not changing. "
+    "Try a different approach, e.g. another element, scrolling, or another URL."
+)
+
+
+@dataclass(frozen=True)
+class Stall:
+    """Why a session was considered stuck."""
+
+    kind: Literal["cycle", "no_progress"]
+    reason: str
+    turn: int
+
+    def as_dict(self) -> dict:
+        """Structured reason, e.g. to log why a session was terminated."""
+        return {"kind": self.kind, "reason": self.reason, "turn": self.turn}
+
+
+def screen_fingerprint(tool_results: list[dict]) -> str | None:
+    """Digest of the last screenshot of a turn's tool results, None if there is none."""
+    images = [
+        content["source"]["data"]
+        for result in tool_results
+        if isinstance(result.get("content"), list)
+        for content in result["content"]
+        if isinstance(content, dict) and content.get("type") == "image"
+    ]
+    if not images:
+        return None
+    return hashlib.sha1(images[-1].encode()).hexdigest()
+
+
+@dataclass
+class StallDetector:
+    """Watch the tool calls and screens of a session for unproductive streaks.
+
+    A session stalls when the same tool calls led to the same screen max_repeats times,
+    or when max_no_progress turns in a row only showed screens already seen. Turns
+    without a screenshot are ignored. The policy tells sampling_loop what to do: send
+    a hint to the model, escalate to a stronger model, or terminate the session.
+    """
+
+    policy: StallPolicy = "hint"
+    max_repeats: int = 3
+    max_no_progress: int = 8
+    hint: str = STALL_HINT
+    stalls: list[Stall] = field(default_factory=list, init=False)
+    _turn: int = field(default=0, init=False)
+    _cycles: Counter = field(default_factory=Counter, init=False)
+    _screens: set[str] = field(default_factory=set, init=False)
+    _no_progress: int = field(default=0, init=False)
+
+    def observe(
+        self, assistant_content: list[dict], tool_results: list[dict]
+    ) -> Stall | None:
+        """Record a turn, returns the stall it completes if any."""
+        self._turn += 1
+        screen = screen_fingerprint(tool_results)
+        if screen is None:
+            return None
+        calls = json.dumps(
+            [
+                [block["name"], block["input"]]
+                for block in assistant_content
+                if block["type"] == "tool_use"
+            ],
+            sort_keys=True,
+        )
+        self._cycles[(calls, screen)] += 1
+        self._no_progress = self._no_progress + 1 if screen in self._screens else 0
+        self._screens.add(screen)
+        stall = None
+        if self._cycles[(calls, screen)] >= self.max_repeats:
+            stall = Stall(
+                kind="cycle",
+                reason=f"the same actions led to the same screen {self.max_repeats} times",
+                turn=self._turn,
+            )
+        elif self._no_progress >= self.max_no_progress:
+            stall = Stall(
+                kind="no_progress",
+                reason=f"the last {self._no_progress} turns showed no new screen",
+                turn=self._turn,
+            )
+        if stall is not None:
+            self.stalls.append(stall)
+            # Give the reaction a chance before detecting the same stall again.
+            self._cycles.clear()
+            self._no_progress = 0
+        return stall
+
+    def hint_text(self, stall: Stall) -> str:
+        """The hint sent to the model."""
+        return self.hint.format(reason=stall.reason)
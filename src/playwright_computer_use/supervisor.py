@@ -0,0 +1,143 @@
+"""Checkpoint a session and restart it in a new page when the browser dies."""
+
+from collections.abc import Awaitable, Callable
+
+from playwright.async_api import Error, Page, StorageState
+
+from playwright_computer_use.async_api import PlaywrightToolbox
+from playwright_computer_use.checkpoint import Checkpoint
+
+# Creates a page to continue the session in, from a context created with the given
+# storage_state (None when there is no checkpoint yet), e.g. in a relaunched browser.
+PageFactory = Callable[[StorageState | None], Awaitable[Page]]
+
+
+class SessionSupervisor:
+    """Keep a session alive across browser and page crashes, see `sampling_loop`.
+
+    After every checkpoint_every turns, the state of the browser and the conversation
+    are captured. When the page is found closed, crashed or disconnected, a new page is
+    created with page_factory and the session continues from the last checkpoint. Every
+    recycle_every turns, the page is replaced the same way, to shed the memory long
+    lived pages accumulate.
+    """
+
+    def __init__(
+        self,
+        page_factory: PageFactory,
+        checkpoint_every: int = 1,
+        recycle_every: int | None = None,
+        checkpoint_path: str | None = None,
+        max_restarts: int = 3,
+    ):
+        """Create a new SessionSupervisor.
+
+        Args:
+            page_factory: Creates the page to continue in, from a storage_state.
+            checkpoint_every: Number of turns between checkpoints.
+            recycle_every: Optional, number of turns after which the page is replaced by a fresh one.
+            checkpoint_path: Optional, JSON file the checkpoints are also written to, see `Checkpoint.load`.
+            max_restarts: Maximum number of crash recoveries, the crash is raised after.
+        """
+        self.page_factory = page_factory
+        self.checkpoint_every = checkpoint_every
+        self.recycle_every = recycle_every
+        self.checkpoint_path = checkpoint_path
+        self.max_restarts = max_restarts
+        self.checkpoint: Checkpoint | None = None
+        self.turn = 0
+        self.restarts = 0
+        self.recycles = 0
+        self.crashed: set[Page] = set()
+        self.watched: set[Page] = set()
+
+    def watch(self, page: Page):
+        """Listen to the crashes of page."""
+        if page not in self.watched:
+            self.watched.add(page)
+            page.on("crash", self.crashed.add)
+
+    def is_alive(self, page: Page) -> bool:
+        """Whether page can still be used."""
+        browser = page.context.browser
+        return (
+            not page.is_closed()
+            and page not in self.crashed
+            and (browser is None or browser.is_connected())
+        )
+
+    async def start(self, tools: PlaywrightToolbox, messages: list):
+        """Take the first checkpoint, before the first turn."""
+        self.watch(tools.page)
+        try:
+            self.checkpoint = await tools.checkpoint(messages, turn=self.turn)
+        except Error:
+            pass
+
+    async def after_turn(self, tools: PlaywrightToolbox, messages: list):
+        """Checkpoint and recycle the page when due, call once the tool results are in messages."""
+        self.turn += 1
+        self.watch(tools.page)
+        if self.turn % self.checkpoint_every == 0 and self.is_alive(tools.page):
+            try:
+                self.checkpoint = await tools.checkpoint(messages, turn=self.turn)
+            except Error:
+                return
+            if self.checkpoint_path is not None:
+                self.checkpoint.save(self.checkpoint_path)
+        if (
+            self.recycle_every is not None
+            and self.turn % self.recycle_every == 0
+            and self.checkpoint is not None
+            and self.checkpoint.turn == self.turn
+        ):
+            old_page = tools.page
+            await self.replace_page(tools, self.checkpoint)
+            self.recycles += 1
+            await self.retire(old_page)
+
+    async def ensure_alive(self, tools: PlaywrightToolbox, messages: list) -> bool:
+        """Restart from the last checkpoint if the page is dead, returns whether it did.
+
+        messages is reset in place to the conversation of the checkpoint.
+        """
+        self.watch(tools.page)
+        if self.is_alive(tools.page):
+            return False
+        if self.restarts >= self.max_restarts:
+            raise RuntimeError(f"The page died after {self.restarts} restarts")
+        self.restarts += 1
+        if self.checkpoint is None:
+            await self.replace_page(tools, None)
+            # Tool calls of the interrupted turn have no result.
+            if messages and messages[-1]["role"] == "assistant":
+                messages.pop()
+        else:
+            await self.replace_page(tools, self.checkpoint)
+            messages[:] = self.checkpoint.messages
+        return True
+
+    async def replace_page(
+        self, tools: PlaywrightToolbox, checkpoint: Checkpoint | None
+    ):
+        """Continue the session of tools in a new page."""
+        page = await self.page_factory(checkpoint.storage_state if checkpoint else None)
+        self.watch(page)
+        if checkpoint is not None:
+            await tools.restore(checkpoint, page)
+        else:
+            if page.context is not tools.page.context:
+                tools.is_setup = False
+            if tools.tabs is not None:
+                tools.tabs.reset(page)
+            tools.set_page(page)
+            await tools.setup()
+
+    async def retire(self, page: Page):
+        """Close a replaced page, and its context once it has no page left."""
+        try:
+            await page.close()
+            if not page.context.pages:
+                await page.context.close()
+        except Error:
+            pass
@@ -1,35 +1,122 @@
-"""This module contains the PlaywrightToolbox class to be used with an Async Playwright Page."""
+"""This module contains the PlaywrightToolbox class to be used with a Sync Playwright Page."""
+
+# Generated from async_api.py by generate_sync.py, do not edit.
+
+from __future__ import annotations
 
-from playwright.sync_api import Page
-from anthropic.types.beta import (
-    BetaToolComputerUse20241022Param,
-    BetaToolParam,
-    BetaToolComputerUse20250124Param,
-)
-from typing import Literal, get_args, cast, Type
-from PIL import Image
-import importlib.resources
-from time import sleep
-import io
 import base64
-from playwright_computer_use.async_api import (
-    ToolError,
-    ToolResult,
-    ComputerToolOptions,
-    Action_20250124,
+import hashlib
+import time
+from typing import TYPE_CHECKING, Callable, Literal, Type, cast
+from playwright.sync_api import CDPSession, Error, FloatRect, Page, Route
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+import io
+
+if TYPE_CHECKING:
+    # Only used in annotations, the anthropic package is slow to import.
+    from anthropic.types.beta import (
+        BetaToolComputerUse20241022Param,
+        BetaToolComputerUse20250124Param,
+        BetaToolParam,
+        BetaToolResultBlockParam,
+    )
+from dataclasses import replace
+from playwright_computer_use.cache import AssetCache
+from playwright_computer_use.checkpoint import Checkpoint
+from playwright_computer_use.sync_backend import (
+    BackgroundTasks,
+    gather,
+    require_async,
+    with_timeout,
+)
+from playwright_computer_use.cdp import (
+    Event,
+    MouseButton,
+    key_press_events,
+    mouse_button_events,
+    mouse_click_events,
+    mouse_move_events,
+    mouse_wheel_events,
+)
+
+# Some of these are only re-exported, they used to be defined in this module.
+from playwright_computer_use.engine import (
+    MODEL_RESOLUTIONS,
+    SCROLL_MULTIPLIER_FACTOR,
+    TIMEOUT_SCREENSHOT_SECONDS,
+    TYPING_GROUP_SIZE,
+    WAIT_DEADLINE_MARGIN,
+    WAIT_POLL_INTERVAL,
+    WAIT_SETTLE_TIME,
     Action_20241022,
+    Action_20250124,
+    ActionPlan,
+    ComputerToolOptions,
+    ImageMediaType,
+    Deadline,
+    InputBackend,
+    ModelResolution,
     ScrollDirection,
+    ToolError,
+    ToolResult,
+    ToolVersion,
+    _make_api_tool_result,
+    _timeout_error,
     chunks,
-    TYPING_GROUP_SIZE,
-    SCROLL_MULTIPLIER_FACTOR,
-    to_playwright_key,
     load_cursor_image,
-    _make_api_tool_result,
+    plan_action,
+    wait_note,
+)
+from playwright_computer_use.hit_test import (
+    CLICK_RESULT_SCRIPT,
+    CLICK_SETTLE_MS,
+    CLICK_WATCH_SCRIPT,
+    describe_click,
+)
+from playwright_computer_use.keys import to_playwright_key, to_playwright_keys
+from playwright_computer_use.virtual_time import FREEZE_ANIMATIONS_SCRIPT
+from playwright_computer_use.routing import (
+    PLACEHOLDER_GIF,
+    ROUTING_PROFILES,
+    HarOptions,
+    RoutingProfile,
+    RoutingStats,
+    rewrite_origin,
+)
+from playwright_computer_use.monitor import (
+    MONITOR_SCRIPT,
+    STATE_SCRIPT,
+    FrameCache,
+    NetworkActivity,
+)
+from playwright_computer_use.navigation import (
+    FIRST_CONTENT_SCRIPT,
+    FIRST_CONTENT_TIMEOUT,
+    NavigationWaitUntil,
+    is_same_url,
+    normalize_url,
+)
+from playwright_computer_use.usage import ImageFormat, ImageQuality
+from playwright_computer_use.recorder import FrameRecorder
+from playwright_computer_use.overview import (
+    DOCUMENT_SIZE_SCRIPT,
+    OVERVIEW_MAX_VIEWPORTS,
+    OverviewLayout,
+    plan_overview,
+    render_overview,
+)
+from playwright_computer_use.tabs import PREFETCH_LINKS_SCRIPT, url_key
+from playwright_computer_use.observation import (
+    SNAPSHOT_SCRIPT,
+    MAX_NAME_LENGTH,
+    ObservationMode,
+    TextSnapshot,
+    format_element,
 )
 
 
 class PlaywrightToolbox:
-    """Toolbox for interaction between Claude and Async Playwright Page."""
+    """Toolbox for interaction between Claude and Sync Playwright Page."""
 
     def __init__(
         self,
@@ -38,65 +125,701 @@ class PlaywrightToolbox:
         screenshot_wait_until: Literal["load", "domcontentloaded", "networkidle"]
         | None = None,
         beta_version: Literal["20241022", "20250124"] = "20250124",
+        observation_mode: ObservationMode = "screenshot",
+        text_token_budget: int = 2000,
+        model_resolution: tuple[int, int] | ModelResolution | None = None,
+        enable_zoom: bool = False,
+        input_backend: InputBackend = "playwright",
+        routing_profile: RoutingProfile | str | None = None,
+        har: HarOptions | None = None,
+        asset_cache: AssetCache | None = None,
+        multi_tab: bool = False,
+        prefetch_links: int = 0,
+        enable_page_overview: bool = False,
+        reuse_unchanged_frames: bool = False,
+        action_timeout: float | None = None,
+        turn_timeout: float | None = None,
+        navigation_wait_until: NavigationWaitUntil | None = None,
+        progressive_observation: bool = False,
+        recorder: FrameRecorder | None = None,
+        click_feedback: bool = False,
+        virtual_time: bool = False,
     ):
         """Create a new PlaywrightToolbox.
 
         Args:
-            page: The Async Playwright page to interact with.
+            page: The Sync Playwright page to interact with.
             use_cursor: Whether to display the cursor in the screenshots or not.
             screenshot_wait_until: Optional, wait until the page is in a specific state before taking a screenshot. Default does not wait
             beta_version: The version of the beta to use. Default is the latest version (Claude3.7)
+            observation_mode: Observe the page with a screenshot, a text snapshot of its interactive elements, or both.
+            text_token_budget: Approximate maximum number of tokens of a text snapshot.
+            model_resolution: Optional, resolution of the screen as seen by the model, e.g. (1024, 768) or "XGA". Default is the page viewport.
+            enable_zoom: Whether to give the model a zoom tool, returning a high resolution crop of a region of the screen.
+            input_backend: Dispatch mouse and keyboard input through Playwright, or in a single burst of raw CDP events ("cdp", Chromium and async API only: sync calls cannot pipeline the events).
+            routing_profile: Optional, a RoutingProfile or the name of one in ROUTING_PROFILES ("lean", "light", "text"), blocking or stubbing the requests of the page's context. Images are not capped with har or asset_cache, which serve them.
+            har: Optional, record the network traffic of the context to a HAR file, or replay it without network access. A recorded HAR is written when the context closes.
+            asset_cache: Optional, an AssetCache shared between toolboxes, serving static assets from disk across sessions. Cannot be combined with har.
+            multi_tab: Whether to give the model a tool to list, switch and close tabs. Tabs opened by the page become active automatically.
+            prefetch_links: With multi_tab, number of visible links to preload in hidden tabs after each screenshot, while the model is thinking. set_url then switches to the preloaded tab. Async API only, sync pages cannot load in the background.
+            enable_page_overview: Whether to give the model a tool returning several screen heights of the page in one tiled image, and clicking in it.
+            reuse_unchanged_frames: Whether to install a monitor in the pages and return the previous screenshot, without capturing, when nothing visible changed since.
+            action_timeout: Optional, seconds an action may take before a timeout error is returned, with a screenshot if possible. The async API cancels the action, the sync API bounds each of its Playwright calls.
+            turn_timeout: Optional, seconds all the actions of a turn may take, see `start_turn`.
+            navigation_wait_until: When set_url and previous_page return: once the navigation is committed, the DOM loaded, or the page loaded. Defaults to "commit" with progressive_observation, "load" otherwise.
+            progressive_observation: Whether set_url and previous_page return an observation as soon as the page shows content, without waiting for it to load. Only useful when navigation_wait_until does not wait for the load.
+            recorder: Optional, keeps the last actions and screenshots in memory, to dump them when the session fails.
+            click_feedback: Whether clicks return what they hit (role, name, tag, href of the element) and whether the focus, URL or DOM changed, to confirm them without a screenshot.
+            virtual_time: Whether to control the page's clock, so the wait action runs its timers at once instead of sleeping (it still waits for the requests they start), and to hold the page still for screenshots: reduced motion, CSS animations and transitions stopped.
         """
         self.page = page
         self.beta_version = beta_version
+        if isinstance(routing_profile, str):
+            routing_profile = ROUTING_PROFILES[routing_profile]
+        if asset_cache is not None and har is not None:
+            raise ValueError("asset_cache cannot be combined with har")
+        self.router = (
+            RequestRouter(
+                routing_profile, cap_images=har is None and asset_cache is None
+            )
+            if routing_profile
+            else None
+        )
+        self.har = har
+        self.cache_router = CacheRouter(asset_cache) if asset_cache else None
+        self.is_setup = False
+        if prefetch_links and not multi_tab:
+            raise ValueError("prefetch_links requires multi_tab")
+        if prefetch_links:
+            # Pages load in the background, while the model thinks.
+            require_async("prefetch_links")
+        self.prefetch_links = prefetch_links
+        self.reuse_unchanged_frames = reuse_unchanged_frames
+        self.action_timeout = action_timeout
+        self.turn_timeout = turn_timeout
+        self.turn_deadline: float | None = None
+        # Of the running action, bounds the Playwright calls of the tools.
+        self.action_deadline = Deadline()
+        self.virtual_time = virtual_time
+        self.progressive_observation = progressive_observation
+        if navigation_wait_until is None:
+            navigation_wait_until = "commit" if progressive_observation else "load"
+        self.recorder = recorder
+        self.tabs = TabPool(page, on_switch=self.set_page) if multi_tab else None
         computer_tool_map: dict[str, Type[BasePlaywrightComputerTool]] = {
             "20241022": PlaywrightComputerTool20241022,
             "20250124": PlaywrightComputerTool20250124,
         }
         ComputerTool = computer_tool_map[beta_version]
+        computer = ComputerTool(
+            page,
+            use_cursor=use_cursor,
+            screenshot_wait_until=screenshot_wait_until,
+            observation_mode=observation_mode,
+            text_token_budget=text_token_budget,
+            model_resolution=model_resolution,
+            input_backend=input_backend,
+            reuse_frames=reuse_unchanged_frames,
+            click_feedback=click_feedback,
+            virtual_time=virtual_time,
+            deadline=self.action_deadline,
+        )
         self.tools: list[
-            BasePlaywrightComputerTool | PlaywrightSetURLTool | PlaywrightBackTool
+            BasePlaywrightComputerTool
+            | PlaywrightSetURLTool
+            | PlaywrightBackTool
+            | PlaywrightZoomTool
+            | PlaywrightTabsTool
+            | PlaywrightPageOverviewTool
         ] = [
-            ComputerTool(
-                page, use_cursor=use_cursor, screenshot_wait_until=screenshot_wait_until
+            computer,
+            PlaywrightSetURLTool(
+                page,
+                tabs=self.tabs,
+                wait_until=navigation_wait_until,
+                deadline=self.action_deadline,
+            ),
+            PlaywrightBackTool(
+                page,
+                tabs=self.tabs,
+                wait_until=navigation_wait_until,
+                deadline=self.action_deadline,
             ),
-            PlaywrightSetURLTool(page),
-            PlaywrightBackTool(page),
         ]
+        if enable_zoom:
+            self.tools.append(PlaywrightZoomTool(computer))
+        if self.tabs is not None:
+            self.tools.append(PlaywrightTabsTool(self.tabs))
+        if enable_page_overview:
+            self.tools.append(PlaywrightPageOverviewTool(computer))
+
+    def set_page(self, page: Page):
+        """Make the tools work with another page of the context, e.g. another tab."""
+        self.page = page
+        for tool in self.tools:
+            if isinstance(
+                tool,
+                (
+                    BasePlaywrightComputerTool,
+                    PlaywrightSetURLTool,
+                    PlaywrightBackTool,
+                    PlaywrightPageOverviewTool,
+                ),
+            ):
+                tool.set_page(page)
+
+    def checkpoint(self, messages: list | None = None, turn: int = 0) -> Checkpoint:
+        """Capture the state needed to continue the session in a new browser, see `restore`."""
+        computer = cast(BasePlaywrightComputerTool, self.tools[0])
+        scroll = self.page.evaluate("[Math.round(scrollX), Math.round(scrollY)]")
+        return Checkpoint(
+            url=self.page.url,
+            storage_state=self.page.context.storage_state(),
+            scroll=(scroll[0], scroll[1]),
+            mouse_position=computer.mouse_position,
+            viewport=self.page.viewport_size,
+            messages=list(messages or []),
+            turn=turn,
+        )
+
+    def restore(self, checkpoint: Checkpoint, page: Page):
+        """Continue the session of checkpoint on page, e.g. from a context created with its storage_state."""
+        if page.context is not self.page.context:
+            # Install the routes and scripts of the toolbox on the new context.
+            self.is_setup = False
+        if self.tabs is not None:
+            self.tabs.reset(page)
+        self.set_page(page)
+        self.setup()
+        if checkpoint.viewport:
+            page.set_viewport_size(checkpoint.viewport)
+        if checkpoint.url != page.url:
+            page.goto(checkpoint.url)
+        page.evaluate("([x, y]) => scrollTo(x, y)", list(checkpoint.scroll))
+        computer = cast(BasePlaywrightComputerTool, self.tools[0])
+        computer.mouse_position = checkpoint.mouse_position
+        page.mouse.move(*checkpoint.mouse_position)
+
+    def start_turn(self):
+        """Start the turn_timeout of the actions requested by a new model response."""
+        if self.turn_timeout is not None:
+            self.turn_deadline = time.monotonic() + self.turn_timeout
+
+    def remaining_time(self) -> tuple[float | None, Literal["action", "turn"]]:
+        """Seconds the next action may take, and which deadline limits it."""
+        if self.turn_timeout is not None and self.turn_deadline is None:
+            self.start_turn()
+        if self.turn_deadline is not None:
+            remaining = max(self.turn_deadline - time.monotonic(), 0)
+            if self.action_timeout is None or remaining < self.action_timeout:
+                return remaining, "turn"
+        return self.action_timeout, "action"
+
+    def timeout_result(
+        self,
+        name: str,
+        input: dict,
+        timeout: float | None,
+        scope: Literal["action", "turn"],
+    ) -> ToolResult:
+        """Structured timeout error, with a screenshot of the page if it can be taken quickly."""
+        error = _timeout_error(name, input, timeout, scope)
+        if timeout is not None and timeout <= 0:
+            return ToolResult(error=error)
+        computer = cast(BasePlaywrightComputerTool, self.tools[0])
+        self.action_deadline.set(TIMEOUT_SCREENSHOT_SECONDS)
+        try:
+            base64_image = with_timeout(computer.capture(), TIMEOUT_SCREENSHOT_SECONDS)
+        except Error:
+            base64_image = None
+        finally:
+            self.action_deadline.set(None)
+        return ToolResult(
+            error=error, base64_image=base64_image, media_type=computer.media_type
+        )
+
+    def set_image_quality(self, quality: ImageQuality):
+        """Send the next screenshots at this quality, e.g. the one a TokenBudget allows."""
+        computer = cast(BasePlaywrightComputerTool, self.tools[0])
+        computer.image_scale = quality.scale
+        computer.image_format = quality.image_format
+        computer.jpeg_quality = quality.jpeg_quality
 
     def to_params(self) -> list[BetaToolParam]:
         """Expose the params of all the tools in the toolbox."""
         return [tool.to_params() for tool in self.tools]
 
-    def run_tool(self, name: str, input: dict, tool_use_id: str):
+    def setup(self):
+        """Install the hooks of the toolbox on the browser context, e.g. the routing profile.
+
+        Called by the first `run_tool`, call it earlier to cover the first navigation.
+        """
+        if self.is_setup:
+            return
+        self.is_setup = True
+        # The last registered route runs first: routing profile, then asset cache or
+        # HAR, then the passthrough of the requests missing from the HAR.
+        if self.har is not None:
+            self.setup_har(self.har)
+        if self.cache_router is not None:
+            self.page.context.route("**/*", self.cache_router)
+        if self.router is not None:
+            self.page.context.route("**/*", self.router)
+        if self.tabs is not None:
+            self.tabs.watch()
+        if self.reuse_unchanged_frames:
+            self.page.context.add_init_script(MONITOR_SCRIPT)
+            self.page.evaluate(MONITOR_SCRIPT)
+        if self.virtual_time:
+            # The clock is shared by the pages of the context.
+            self.page.clock.install()
+            cast(BasePlaywrightComputerTool, self.tools[0]).reduce_motion()
+            self.page.context.add_init_script(FREEZE_ANIMATIONS_SCRIPT)
+            self.page.evaluate(FREEZE_ANIMATIONS_SCRIPT)
+
+    def setup_har(self, har: HarOptions):
+        """Record the traffic of the context to the HAR file, or replay it."""
+        context = self.page.context
+        if har.mode == "record":
+            context.route_from_har(
+                har.path, url=har.url_filter, update=True, update_content="embed"
+            )
+            return
+        origin = har.passthrough_origin
+        if har.not_found == "passthrough" and origin is not None:
+
+            def passthrough(route: Route):
+                response = route.fetch(url=rewrite_origin(route.request.url, origin))
+                route.fulfill(response=response)
+
+            context.route(har.url_filter or "**/*", passthrough)
+        context.route_from_har(
+            har.path,
+            url=har.url_filter,
+            not_found="fallback" if har.not_found == "passthrough" else "abort",
+        )
+
+    def run_tool(
+        self, name: str, input: dict, tool_use_id: str
+    ) -> BetaToolResultBlockParam:
         """Pick the right tool using `name` and run it."""
+        self.setup()
         if name not in [tool.name for tool in self.tools]:
             return ToolError(message=f"Unknown tool {name}, only computer use allowed")
         tool = next(tool for tool in self.tools if tool.name == name)
-        result = tool(**input)
+        timeout, scope = self.remaining_time()
+        self.action_deadline.set(timeout)
+        try:
+            if timeout is not None and timeout <= 0:
+                raise PlaywrightTimeoutError("No time left for the action")
+            result = with_timeout(tool(**input), timeout)
+            if (
+                self.progressive_observation
+                and name in ("set_url", "previous_page")
+                and not result.error
+            ):
+                result = self.observe_first_content(result)
+        except PlaywrightTimeoutError:
+            result = self.timeout_result(name, input, timeout, scope)
+        finally:
+            self.action_deadline.set(None)
+        if self.tabs is not None:
+            result = self.update_tabs(result)
+        if self.recorder is not None:
+            self.record(name, input, result)
         return _make_api_tool_result(tool_use_id=tool_use_id, result=result)
 
+    def record(self, name: str, input: dict, result: ToolResult):
+        """Add an action and its result to the recorder."""
+        computer = cast(BasePlaywrightComputerTool, self.tools[0])
+        cast(FrameRecorder, self.recorder).record(
+            tool=name,
+            input=input,
+            output=result.output,
+            error=result.error,
+            base64_image=result.base64_image,
+            media_type=result.media_type,
+            url=self.page.url,
+            cursor=computer.mouse_position,
+            viewport=self.page.viewport_size,
+        )
+
+    def observe_first_content(self, result: ToolResult) -> ToolResult:
+        """Add an observation of the page as soon as it shows content, even if it is still loading."""
+        timeout = FIRST_CONTENT_TIMEOUT * 1000
+        remaining = self.action_deadline.timeout_ms()
+        try:
+            self.page.wait_for_function(
+                FIRST_CONTENT_SCRIPT,
+                timeout=timeout if remaining is None else min(timeout, remaining),
+            )
+        except Error:
+            pass
+        computer = cast(BasePlaywrightComputerTool, self.tools[0])
+        observation = computer.screenshot(wait_for_load=False)
+        notes = [result.output, observation.output]
+        if self.page.evaluate("document.readyState") != "complete":
+            notes.append("The page is still loading, wait to see the rest.")
+        return replace(
+            result,
+            output="\n".join(note for note in notes if note) or None,
+            base64_image=observation.base64_image,
+            media_type=observation.media_type,
+        )
+
+    def update_tabs(self, result: ToolResult) -> ToolResult:
+        """Adopt the tabs opened by the action, and prefetch links in the async API."""
+        tabs = cast(TabPool, self.tabs)
+        for page in tabs.adopt_new_pages():
+            note = f"A new tab was opened and is now active: {page.url}"
+            result = replace(
+                result, output=f"{result.output}\n{note}" if result.output else note
+            )
+        if self.prefetch_links and result.base64_image is not None:
+            try:
+                urls = self.page.evaluate(PREFETCH_LINKS_SCRIPT, self.prefetch_links)
+            except Error:
+                return result
+            tabs.prefetch_in_background(urls)
+        return result
+
+
+class RequestRouter:
+    """Route handler applying a RoutingProfile to the requests of a browser context."""
+
+    def __init__(self, profile: RoutingProfile, cap_images: bool = True):
+        """Create a new RequestRouter.
+
+        Args:
+            profile: The routing profile to apply.
+            cap_images: Whether to fetch images to cap their size. Disable it when other
+                route handlers serve them (HAR replay, asset cache), the images are then
+                passed on to them uncapped.
+        """
+        self.profile = profile
+        self.cap_images = cap_images
+        self.stats = RoutingStats()
+
+    def __call__(self, route: Route):
+        """Block, stub, cap or pass on the request to the next route handler."""
+        request = route.request
+        decision = self.profile.decide(request.url, request.resource_type)
+        if decision == "block":
+            self.stats.record_block(request.resource_type)
+            route.abort("blockedbyclient")
+        elif decision == "stub":
+            self.stats.stubbed_scripts += 1
+            route.fulfill(status=200, content_type="application/javascript", body="")
+        elif decision == "cap" and self.cap_images:
+            try:
+                response = route.fetch()
+                body = response.body()
+            except Error:
+                route.fallback()
+                return
+            max_image_bytes = cast(int, self.profile.max_image_bytes)
+            if len(body) > max_image_bytes:
+                self.stats.capped_images += 1
+                self.stats.bytes_saved += len(body) - len(PLACEHOLDER_GIF)
+                route.fulfill(
+                    status=200, content_type="image/gif", body=PLACEHOLDER_GIF
+                )
+            else:
+                route.fulfill(response=response, body=body)
+        else:
+            route.fallback()
+
+
+class CacheRouter:
+    """Route handler serving static assets from an AssetCache."""
+
+    def __init__(self, cache: AssetCache):
+        """Create a new CacheRouter.
+
+        Args:
+            cache: The asset cache, possibly shared with other toolboxes.
+        """
+        self.cache = cache
+
+    def __call__(self, route: Route):
+        """Serve the request from the cache, revalidating it if needed, or fetch and store it."""
+        request = route.request
+        if not self.cache.is_cacheable_request(
+            request.method, request.resource_type, request.headers
+        ):
+            route.fallback()
+            return
+        entry = self.cache.lookup(request.url)
+        body = self.cache.read(entry) if entry is not None else None
+        if entry is not None and body is not None and self.cache.is_fresh(entry):
+            self.cache.hits += 1
+            route.fulfill(status=entry.status, headers=entry.headers, body=body)
+            return
+        headers = dict(request.headers)
+        if entry is not None and body is not None:
+            headers.update(self.cache.validators(entry))
+        try:
+            response = route.fetch(headers=headers)
+        except Error:
+            route.fallback()
+            return
+        if entry is not None and body is not None and response.status == 304:
+            self.cache.revalidated += 1
+            entry = self.cache.refresh(entry, response.headers)
+            route.fulfill(status=entry.status, headers=entry.headers, body=body)
+            return
+        self.cache.misses += 1
+        body = response.body()
+        self.cache.store(request.url, response.status, response.headers, body)
+        route.fulfill(response=response, body=body)
+
+
+class TabPool:
+    """The tabs the toolbox works with, and hidden tabs prefetching likely next pages."""
+
+    def __init__(
+        self,
+        page: Page,
+        on_switch: Callable[[Page], None],
+        max_prefetched: int = 3,
+    ):
+        """Create a new TabPool.
+
+        Args:
+            page: The initial and active tab.
+            on_switch: Called with the new active tab when it changes.
+            max_prefetched: Maximum number of hidden prefetched tabs, the oldest are closed.
+        """
+        self.tabs = [page]
+        self.active = page
+        self.on_switch = on_switch
+        self.max_prefetched = max_prefetched
+        # url_key -> hidden tab, oldest first.
+        self.prefetched: dict[str, Page] = {}
+        # Tab -> the tab it was opened from, to go back to it.
+        self.openers: dict[Page, Page] = {}
+        # Tabs a preloaded tab replaced, oldest first, hidden until going back to them.
+        self.left_behind: list[Page] = []
+        self.new_pages: list[Page] = []
+        # url_key of the tabs being opened, reserved so they are only opened once.
+        self.opening: set[str] = set()
+        self.background = BackgroundTasks()
+
+    def reset(self, page: Page):
+        """Forget all the tabs, page becomes the only one, e.g. after a browser restart."""
+        self.tabs = [page]
+        self.active = page
+        self.prefetched.clear()
+        self.openers.clear()
+        self.left_behind.clear()
+        self.new_pages.clear()
+
+    def watch(self):
+        """Collect the pages opened in the context, e.g. popups and target=_blank links."""
+        self.active.context.on("page", self.new_pages.append)
+
+    def switch(self, page: Page):
+        """Make page the active tab, adding it to the tabs if needed."""
+        if page not in self.tabs:
+            self.tabs.insert(self.tabs.index(self.active) + 1, page)
+        if (
+            page.viewport_size != self.active.viewport_size
+            and self.active.viewport_size
+        ):
+            page.set_viewport_size(self.active.viewport_size)
+        self.active = page
+        self.on_switch(page)
+
+    def adopt_new_pages(self) -> list[Page]:
+        """Switch to the pages opened since the last call, returns them."""
+        if self.opening:
+            # A prefetched tab is being opened, it will be recognized once it is.
+            return []
+        adopted = []
+        for page in self.new_pages:
+            if (
+                page in self.tabs
+                or page in self.prefetched.values()
+                or page.is_closed()
+            ):
+                continue
+            self.openers[page] = self.active
+            self.switch(page)
+            adopted.append(page)
+        self.new_pages.clear()
+        return adopted
+
+    def close(self, index: int):
+        """Close the tab at index, switching to its opener or neighbour if it is active."""
+        page = self.tabs.pop(index)
+        if page is self.active:
+            opener = self.openers.get(page)
+            self.switch(opener if opener in self.tabs else self.tabs[max(index - 1, 0)])
+        page.close()
+
+    def describe(self) -> str:
+        """List the tabs, for the model."""
+        lines = []
+        for index, page in enumerate(self.tabs):
+            active = " (active)" if page is self.active else ""
+            lines.append(f"{index}: {page.title()} - {page.url}{active}")
+        return "\n".join(lines)
+
+    def take_prefetched(self, url: str) -> Page | None:
+        """Replace the active tab by the tab prefetching url, if any.
+
+        The navigation happens in place: the replaced tab is hidden, to go back to it,
+        and only the last max_prefetched of them are kept open.
+        """
+        page = self.prefetched.pop(url_key(url), None)
+        if page is None or page.is_closed():
+            return None
+        replaced = self.active
+        self.tabs[self.tabs.index(replaced)] = page
+        self.openers[page] = replaced
+        self.left_behind.append(replaced)
+        while len(self.left_behind) > self.max_prefetched:
+            self.left_behind.pop(0).close()
+        self.switch(page)
+        return page
+
+    def return_to_opener(self) -> bool:
+        """Switch back to the tab the active one was opened from, returns whether it could.
+
+        A tab replaced by a preloaded one takes its place again, closing it.
+        """
+        page = self.active
+        opener = self.openers.get(page)
+        if opener is None or opener.is_closed():
+            return False
+        if opener in self.left_behind:
+            self.left_behind.remove(opener)
+            self.tabs[self.tabs.index(page)] = opener
+            self.switch(opener)
+            page.close()
+            return True
+        if opener in self.tabs:
+            self.switch(opener)
+            return True
+        return False
+
+    def prefetch_in_background(self, urls: list[str]):
+        """Start prefetching urls without waiting, while the model is thinking."""
+        self.background.start(self.prefetch(urls))
+
+    def prefetch(self, urls: list[str]):
+        """Open urls in hidden tabs, returning as soon as the navigations are committed."""
+        context = self.active.context
+        for url in urls:
+            key = url_key(url)
+            if key in self.prefetched or key in self.opening:
+                continue
+            self.opening.add(key)
+            try:
+                page = context.new_page()
+                try:
+                    page.goto(url, wait_until="commit")
+                except Error:
+                    page.close()
+                    continue
+                # Only offered once committed, before it is still about:blank.
+                self.prefetched[key] = page
+            finally:
+                self.opening.discard(key)
+        while len(self.prefetched) > self.max_prefetched:
+            page = self.prefetched.pop(next(iter(self.prefetched)))
+            page.close()
+
+
+class PlaywrightTabsTool:
+    """Tool to list, switch and close the tabs of the browser."""
+
+    name: Literal["tabs"] = "tabs"
+
+    def __init__(self, tabs: TabPool):
+        """Create a new PlaywrightTabsTool.
+
+        Args:
+            tabs: The tab pool of the toolbox.
+        """
+        super().__init__()
+        self.tabs = tabs
+
+    def to_params(self) -> BetaToolParam:
+        """Params describing the tool. Description used by Claude to understand how to this use tool."""
+        return {
+            "name": self.name,
+            "description": "This tool lists the open browser tabs, switches to a tab or closes it. Tabs opened by the page (popups, links opening a new tab) become active automatically.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "action": {
+                        "type": "string",
+                        "enum": ["list", "switch", "close"],
+                        "description": "What to do.",
+                    },
+                    "tab": {
+                        "type": "integer",
+                        "description": "Index of the tab to switch to or close, as listed.",
+                    },
+                },
+                "required": ["action"],
+            },
+        }
+
+    def __call__(self, *, action: str, tab: int | None = None):
+        """List, switch or close tabs."""
+        if action == "list":
+            return ToolResult(output=self.tabs.describe())
+        if action not in ("switch", "close"):
+            return ToolResult(error=f"Invalid action: {action}")
+        if not isinstance(tab, int) or not 0 <= tab < len(self.tabs.tabs):
+            return ToolResult(error=f"{tab=} must be the index of an open tab")
+        if action == "switch":
+            self.tabs.switch(self.tabs.tabs[tab])
+        else:
+            if len(self.tabs.tabs) == 1:
+                return ToolResult(error="The last tab cannot be closed")
+            self.tabs.close(tab)
+        return ToolResult(output=self.tabs.describe())
+
 
 class PlaywrightSetURLTool:
     """Tool to navigate to a specific URL."""
 
     name: Literal["set_url"] = "set_url"
 
-    def __init__(self, page: Page):
+    def __init__(
+        self,
+        page: Page,
+        tabs: TabPool | None = None,
+        wait_until: NavigationWaitUntil = "load",
+        deadline: Deadline | None = None,
+    ):
         """Create a new PlaywrightSetURLTool.
 
         Args:
             page: The Sync Playwright page to interact with.
+            tabs: Optional, the tab pool, to switch to a tab where the url is preloaded.
+            wait_until: Return once the navigation is committed, the DOM loaded, or the page loaded.
+            deadline: Optional, the deadline of the toolbox's actions, bounding the navigation.
         """
         super().__init__()
         self.page = page
+        self.tabs = tabs
+        self.wait_until = wait_until
+        self.deadline = deadline or Deadline()
+
+    def set_page(self, page: Page):
+        """Navigate another page from now on."""
+        self.page = page
 
     def to_params(self) -> BetaToolParam:
         """Params describing the tool. Description used by Claude to understand how to this use tool."""
-        return BetaToolParam(
-            name=self.name,
-            description="This tool allows to go directly to a specified URL.",
-            input_schema={
+        return {
+            "name": self.name,
+            "description": "This tool allows to go directly to a specified URL.",
+            "input_schema": {
                 "type": "object",
                 "properties": {
                     "url": {
@@ -106,13 +829,22 @@ class PlaywrightSetURLTool:
                 },
                 "required": ["url"],
             },
-        )
+        }
 
     def __call__(self, *, url: str):
         """Trigger goto the chosen url."""
+        url = normalize_url(url)
+        if is_same_url(url, self.page.url):
+            return ToolResult(output=f"Already at {url}.")
         try:
-            self.page.goto(url)
+            if self.tabs is not None and self.tabs.take_prefetched(url):
+                return ToolResult(output=f"Navigated to {url} (preloaded tab).")
+            self.page.goto(
+                url, wait_until=self.wait_until, timeout=self.deadline.timeout_ms()
+            )
             return ToolResult()
+        except PlaywrightTimeoutError:
+            raise
         except Exception as e:
             return ToolResult(error=str(e))
 
@@ -122,40 +854,390 @@ class PlaywrightBackTool:
 
     name: Literal["previous_page"] = "previous_page"
 
-    def __init__(self, page: Page):
+    def __init__(
+        self,
+        page: Page,
+        tabs: TabPool | None = None,
+        wait_until: NavigationWaitUntil = "load",
+        deadline: Deadline | None = None,
+    ):
         """Create a new PlaywrightBackTool.
 
         Args:
             page: The Sync Playwright page to interact with.
+            tabs: Optional, the tab pool, to go back to the tab a tab was opened from.
+            wait_until: Return once the navigation is committed, the DOM loaded, or the page loaded.
+            deadline: Optional, the deadline of the toolbox's actions, bounding the navigation.
         """
         super().__init__()
         self.page = page
+        self.tabs = tabs
+        self.wait_until = wait_until
+        self.deadline = deadline or Deadline()
+
+    def set_page(self, page: Page):
+        """Navigate another page from now on."""
+        self.page = page
 
     def to_params(self) -> BetaToolParam:
         """Params describing the tool. Description used by Claude to understand how to this use tool."""
-        return BetaToolParam(
-            name=self.name,
-            description="This tool navigate to the previous page.",
-            input_schema={
+        return {
+            "name": self.name,
+            "description": "This tool navigate to the previous page.",
+            "input_schema": {
                 "type": "object",
                 "properties": {},
                 "required": [],
             },
-        )
+        }
 
     def __call__(self):
         """Trigger the back button in the browser."""
         try:
-            self.page.go_back()
+            response = self.page.go_back(
+                wait_until=self.wait_until, timeout=self.deadline.timeout_ms()
+            )
+            if (
+                response is None
+                and self.tabs is not None
+                and self.tabs.return_to_opener()
+            ):
+                return ToolResult(
+                    output="Switched back to the tab this one was opened from."
+                )
             return ToolResult()
+        except PlaywrightTimeoutError:
+            raise
+        except Exception as e:
+            return ToolResult(error=str(e))
+
+
+class PlaywrightZoomTool:
+    """Tool to look at a region of the screen in high resolution."""
+
+    name: Literal["zoom"] = "zoom"
+
+    def __init__(self, computer: "BasePlaywrightComputerTool"):
+        """Create a new PlaywrightZoomTool.
+
+        Args:
+            computer: The computer tool, whose screen coordinates the region refers to.
+        """
+        super().__init__()
+        self.computer = computer
+
+    def to_params(self) -> BetaToolParam:
+        """Params describing the tool. Description used by Claude to understand how to this use tool."""
+        return {
+            "name": self.name,
+            "description": "This tool returns a high resolution image of a region of the screen. Use it to read small text or inspect details.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "region": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "minItems": 4,
+                        "maxItems": 4,
+                        "description": "[x0, y0, x1, y1] the top left and bottom right corners of the region, in screen coordinates.",
+                    }
+                },
+                "required": ["region"],
+            },
+        }
+
+    def __call__(self, *, region: list[int]):
+        """Take a screenshot of the region at the device resolution."""
+        from PIL import Image
+
+        if (
+            not isinstance(region, list)
+            or len(region) != 4
+            or not all(isinstance(i, int) and i >= 0 for i in region)
+        ):
+            return ToolResult(error=f"{region} must be a list of 4 non-negative ints")
+        x0, y0, x1, y1 = region
+        if x1 <= x0 or y1 <= y0:
+            return ToolResult(error=f"{region} must have x0 < x1 and y0 < y1")
+        scale_x, scale_y = self.computer.scale
+        x = x0 / scale_x
+        y = y0 / scale_y
+        clip: FloatRect = {
+            "x": x,
+            "y": y,
+            "width": min(x1 / scale_x, self.computer.width) - x,
+            "height": min(y1 / scale_y, self.computer.height) - y,
+        }
+        if clip["width"] <= 0 or clip["height"] <= 0:
+            return ToolResult(error=f"{region} is outside of the screen")
+        try:
+            screenshot = self.computer.page.screenshot(
+                clip=clip, scale="device", timeout=self.computer.deadline.timeout_ms()
+            )
+        except PlaywrightTimeoutError:
+            raise
         except Exception as e:
             return ToolResult(error=str(e))
+        image = Image.open(io.BytesIO(screenshot))
+        # Never return more pixels than a full screenshot.
+        image.thumbnail(
+            (self.computer.model_width, self.computer.model_height),
+            Image.Resampling.LANCZOS,
+        )
+        buffered = io.BytesIO()
+        image.save(buffered, format="PNG")
+        return ToolResult(base64_image=base64.b64encode(buffered.getvalue()).decode())
+
+
+class PlaywrightPageOverviewTool:
+    """Tool to see several viewport heights of the page at once, and click in them."""
+
+    name: Literal["page_overview"] = "page_overview"
+
+    def __init__(self, computer: "BasePlaywrightComputerTool"):
+        """Create a new PlaywrightPageOverviewTool.
+
+        Args:
+            computer: The computer tool, clicks are dispatched through its input backend.
+        """
+        super().__init__()
+        self.computer = computer
+        self.layout: OverviewLayout | None = None
+
+    def set_page(self, page: Page):
+        """Forget the last overview, it was of another page."""
+        self.layout = None
+
+    def to_params(self) -> BetaToolParam:
+        """Params describing the tool. Description used by Claude to understand how to this use tool."""
+        return {
+            "name": self.name,
+            "description": (
+                "This tool returns one image of the page from the current scroll position "
+                "down, cut in numbered tiles of one screen height, to read a long page "
+                "without scrolling. Click on the last overview with its image coordinates, "
+                "the page scrolls to the element first."
+            ),
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "action": {
+                        "type": "string",
+                        "enum": ["capture", "click"],
+                        "description": "Capture an overview, or click on the last one.",
+                    },
+                    "viewports": {
+                        "type": "integer",
+                        "description": f"For capture, number of screen heights to include, at most {OVERVIEW_MAX_VIEWPORTS}. Default is the rest of the page, up to the maximum.",
+                    },
+                    "coordinate": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "minItems": 2,
+                        "maxItems": 2,
+                        "description": "For click, [x, y] in the last overview image.",
+                    },
+                },
+                "required": ["action"],
+            },
+        }
+
+    def __call__(
+        self,
+        *,
+        action: str,
+        viewports: int | None = None,
+        coordinate: list[int] | None = None,
+    ):
+        """Capture an overview, or click on the last one."""
+        if action == "capture":
+            return self.capture(viewports or OVERVIEW_MAX_VIEWPORTS)
+        if action == "click":
+            return self.click(coordinate)
+        return ToolResult(error=f"Invalid action: {action}")
+
+    def capture(self, viewports: int) -> ToolResult:
+        """Screenshot the page from the scroll position down, and lay it out in tiles."""
+        from PIL import Image
+
+        if not isinstance(viewports, int) or viewports <= 0:
+            return ToolResult(error=f"{viewports=} must be a positive int")
+        viewports = min(viewports, OVERVIEW_MAX_VIEWPORTS)
+        page = self.computer.page
+        left, top, document_height = page.evaluate(DOCUMENT_SIZE_SCRIPT)
+        width, height = self.computer.width, self.computer.height
+        bottom = min(top + viewports * height, max(document_height, top + height))
+        screenshot = page.screenshot(
+            full_page=True,
+            clip={"x": left, "y": top, "width": width, "height": bottom - top},
+            scale="css",
+            timeout=self.computer.deadline.timeout_ms(),
+        )
+        self.layout = plan_overview(width, top, bottom, height, left=left)
+        overview = render_overview(Image.open(io.BytesIO(screenshot)), self.layout)
+        buffered = io.BytesIO()
+        overview.save(buffered, format="PNG")
+        return ToolResult(
+            output=self.layout.legend(),
+            base64_image=base64.b64encode(buffered.getvalue()).decode(),
+        )
+
+    def click(self, coordinate: list[int] | None) -> ToolResult:
+        """Scroll the point of the last overview into the viewport and click it."""
+        if self.layout is None:
+            return ToolResult(error="Capture an overview first")
+        if not isinstance(coordinate, list) or len(coordinate) != 2:
+            return ToolResult(error=f"{coordinate} must be a list of 2 ints")
+        point = self.layout.to_document((coordinate[0], coordinate[1]))
+        if point is None:
+            return ToolResult(error=f"{coordinate} is not on a tile of the overview")
+        x, y = point
+        page = self.computer.page
+        scroll_x, scroll_y = page.evaluate(
+            "(y) => { scrollTo(scrollX, y - innerHeight / 2); return [Math.round(scrollX), Math.round(scrollY)]; }",
+            y,
+        )
+        position = (
+            min(max(x - scroll_x, 0), self.computer.width - 1),
+            min(max(y - scroll_y, 0), self.computer.height - 1),
+        )
+        self.computer.mouse_position = position
+        self.computer.input.click(*position, button="left", click_count=1)
+        return self.computer.screenshot()
+
+
+class PlaywrightInput:
+    """Dispatch mouse and keyboard input with Playwright, works with every browser."""
+
+    def __init__(self, page: Page):
+        """Create a new PlaywrightInput.
+
+        Args:
+            page: The Sync Playwright page to interact with.
+        """
+        self.page = page
+
+    def move(self, x: int, y: int):
+        """Move the mouse to (x, y)."""
+        self.page.mouse.move(x, y)
+
+    def down(self, x: int, y: int):
+        """Press the left mouse button, the mouse is already at (x, y)."""
+        self.page.mouse.down()
+
+    def up(self, x: int, y: int):
+        """Release the left mouse button, the mouse is already at (x, y)."""
+        self.page.mouse.up()
+
+    def click(
+        self,
+        x: int,
+        y: int,
+        button: MouseButton = "left",
+        click_count: int = 1,
+        delay: float | None = None,
+        modifiers: list[str] | None = None,
+    ):
+        """Click at (x, y) while holding the modifiers."""
+        for modifier in modifiers or []:
+            self.page.keyboard.down(modifier)
+        self.page.mouse.click(x, y, button=button, click_count=click_count, delay=delay)
+        for modifier in reversed(modifiers or []):
+            self.page.keyboard.up(modifier)
+
+    def wheel(self, x: int, y: int, delta_x: int, delta_y: int):
+        """Scroll with the mouse wheel, the mouse is already at (x, y)."""
+        self.page.mouse.wheel(delta_x=delta_x, delta_y=delta_y)
+
+    def press(self, keys: list[str]):
+        """Press keys[-1] while holding the modifiers keys[:-1], in a single call."""
+        self.page.keyboard.press("+".join(keys))
+
+
+class CDPInput(PlaywrightInput):
+    """Dispatch mouse and keyboard input as raw CDP events, pipelined in a single burst.
+
+    Only available with Chromium, falls back to Playwright with other browsers and for
+    keys without a CDP key definition.
+    """
+
+    def __init__(self, page: Page):
+        """Create a new CDPInput.
+
+        Args:
+            page: The Sync Playwright page to interact with.
+        """
+        super().__init__(page)
+        self.session: CDPSession | None = None
+        self.supported = True
+        # Mouse buttons pressed, last pressed last, sent with the events to drag.
+        self.held: list[MouseButton] = []
+
+    def dispatch(self, events: list[Event] | None) -> bool:
+        """Send all the events without waiting in between. False if CDP is not usable."""
+        if events is None or not self.supported:
+            return False
+        if self.session is None:
+            try:
+                self.session = self.page.context.new_cdp_session(self.page)
+            except Error:
+                self.supported = False
+                return False
+        # Events on a session are processed in order, only the last reply matters.
+        gather(*(self.session.send(method, params) for method, params in events))
+        return True
+
+    def move(self, x: int, y: int):
+        """Move the mouse to (x, y)."""
+        if not self.dispatch(mouse_move_events(x, y, self.held)):
+            super().move(x, y)
+
+    def down(self, x: int, y: int):
+        """Press the left mouse button at (x, y)."""
+        held: list[MouseButton] = [*self.held, "left"]
+        events = mouse_button_events(x, y, "left", pressed=True, held=held)
+        if not self.dispatch(events):
+            super().down(x, y)
+        self.held = held
+
+    def up(self, x: int, y: int):
+        """Release the left mouse button at (x, y)."""
+        held: list[MouseButton] = [button for button in self.held if button != "left"]
+        events = mouse_button_events(x, y, "left", pressed=False, held=held)
+        if not self.dispatch(events):
+            super().up(x, y)
+        self.held = held
+
+    def click(
+        self,
+        x: int,
+        y: int,
+        button: MouseButton = "left",
+        click_count: int = 1,
+        delay: float | None = None,
+        modifiers: list[str] | None = None,
+    ):
+        """Click at (x, y) while holding the modifiers."""
+        events = mouse_click_events(x, y, button, click_count, modifiers, self.held)
+        if not self.dispatch(events):
+            super().click(x, y, button, click_count, delay, modifiers)
+
+    def wheel(self, x: int, y: int, delta_x: int, delta_y: int):
+        """Scroll with the mouse wheel at (x, y)."""
+        if not self.dispatch(mouse_wheel_events(x, y, delta_x, delta_y)):
+            super().wheel(x, y, delta_x, delta_y)
+
+    def press(self, keys: list[str]):
+        """Press keys[-1] while holding the modifiers keys[:-1]."""
+        if not self.dispatch(key_press_events(keys)):
+            super().press(keys)
 
 
 class BasePlaywrightComputerTool:
     """A tool that allows the agent to interact with Sync Playwright Page."""
 
     name: Literal["computer"] = "computer"
+    api_type: ToolVersion
 
     @property
     def width(self) -> int:
@@ -167,13 +1249,30 @@ class BasePlaywrightComputerTool:
         """The height of the Playwright page in pixels."""
         return self.page.viewport_size["height"]
 
+    @property
+    def model_width(self) -> int:
+        """The width of the screen as seen by the model, in pixels."""
+        width = self.model_resolution[0] if self.model_resolution else self.width
+        return max(round(width * self.image_scale), 1)
+
+    @property
+    def model_height(self) -> int:
+        """The height of the screen as seen by the model, in pixels."""
+        height = self.model_resolution[1] if self.model_resolution else self.height
+        return max(round(height * self.image_scale), 1)
+
+    @property
+    def media_type(self) -> ImageMediaType:
+        """The media type of the screenshots."""
+        return "image/jpeg" if self.image_format == "jpeg" else "image/png"
+
     @property
     def options(self) -> ComputerToolOptions:
         """The options of the tool."""
         return {
-            "display_width_px": self.width,
-            "display_height_px": self.height,
-            "display_number": 0,  # hardcoded
+            "display_width_px": self.model_width,
+            "display_height_px": self.model_height,
+            "display_number": 1,  # hardcoded
         }
 
     def to_params(self):
@@ -186,6 +1285,14 @@ class BasePlaywrightComputerTool:
         use_cursor: bool = True,
         screenshot_wait_until: Literal["load", "domcontentloaded", "networkidle"]
         | None = None,
+        observation_mode: ObservationMode = "screenshot",
+        text_token_budget: int = 2000,
+        model_resolution: tuple[int, int] | ModelResolution | None = None,
+        input_backend: InputBackend = "playwright",
+        reuse_frames: bool = False,
+        click_feedback: bool = False,
+        virtual_time: bool = False,
+        deadline: Deadline | None = None,
     ):
         """Initializes the PlaywrightComputerTool.
 
@@ -193,118 +1300,353 @@ class BasePlaywrightComputerTool:
             page: The Sync Playwright page to interact with.
             use_cursor: Whether to display the cursor in the screenshots or not.
             screenshot_wait_until: Optional, wait until the page is in a specific state before taking a screenshot. Default does not wait
+            observation_mode: Observe the page with a screenshot, a text snapshot of its interactive elements, or both.
+            text_token_budget: Approximate maximum number of tokens of a text snapshot.
+            model_resolution: Optional, resolution of the screen as seen by the model, e.g. (1024, 768) or "XGA". Screenshots are scaled to it and coordinates mapped back to the page. Default is the page viewport.
+            input_backend: Dispatch mouse and keyboard input through Playwright, or in a single burst of raw CDP events ("cdp", Chromium and async API only: sync calls cannot pipeline the events).
+            reuse_frames: Whether to return the previous screenshot when the page monitor (see `monitor.MONITOR_SCRIPT`) reports no change since.
+            click_feedback: Whether clicks return a text description of the element hit and of what changed.
+            virtual_time: Whether the page's clock is controlled, see `PlaywrightToolbox`: wait advances it, and screenshots stop animations.
+            deadline: Optional, the deadline of the toolbox's actions, bounding the Playwright calls and the wait action.
         """
         super().__init__()
         self.page = page
+        if input_backend == "cdp":
+            # Sync calls would wait for each event instead of pipelining them.
+            require_async("input_backend='cdp'")
+        self.input = CDPInput(page) if input_backend == "cdp" else PlaywrightInput(page)
         self.use_cursor = use_cursor
+        self.model_resolution = (
+            MODEL_RESOLUTIONS[model_resolution]
+            if isinstance(model_resolution, str)
+            else model_resolution
+        )
+        # In page coordinates, see `to_page` and `to_model`.
         self.mouse_position: tuple[int, int] = (0, 0)
         self.screenshot_wait_until = screenshot_wait_until
+        self.observation_mode = observation_mode
+        self.text_snapshot = TextSnapshot(token_budget=text_token_budget)
+        self.frame_cache = FrameCache() if reuse_frames else None
+        # Lowered by the toolbox as the session gets close to its token budget.
+        self.image_scale = 1.0
+        # Size of the last screenshot, to tell the model when image_scale changes it.
+        self.observed_size: tuple[int, int] | None = None
+        self.image_format: ImageFormat = "png"
+        self.jpeg_quality = 85
+        self.deadline = deadline or Deadline()
+        self.click_feedback = click_feedback
+        self.virtual_time = virtual_time
+        self.motion_reduced = False
+
+    def set_page(self, page: Page):
+        """Interact with another page from now on, e.g. another tab."""
+        self.page = page
+        self.input = type(self.input)(page)
+        # Media emulation is per page, unlike the clock: applied by the next screenshot.
+        self.motion_reduced = False
+        self.text_snapshot.reset()
+        if self.frame_cache is not None:
+            self.frame_cache.reset()
 
     def __call__(
         self,
         *,
-        action: Action_20241022,
+        action: Action_20250124,
         text: str | None = None,
         coordinate: tuple[int, int] | None = None,
+        scroll_direction: ScrollDirection | None = None,
+        scroll_amount: int | None = None,
+        duration: int | float | None = None,
+        key: str | None = None,
         **kwargs,
     ):
-        """Run an action. text and coordinate are potential additional parameters."""
-        if action in ("mouse_move", "left_click_drag"):
-            if coordinate is None:
-                raise ToolError(f"coordinate is required for {action}")
-            if text is not None:
-                raise ToolError(f"text is not accepted for {action}")
-            if not isinstance(coordinate, list) or len(coordinate) != 2:
-                raise ToolError(f"{coordinate} must be a tuple of length 2")
-            if not all(isinstance(i, int) and i >= 0 for i in coordinate):
-                raise ToolError(f"{coordinate} must be a tuple of non-negative ints")
-
-            x, y = coordinate
-
-            if action == "mouse_move":
-                action = self.page.mouse.move(x, y)
-                self.mouse_position = (x, y)
-                return ToolResult(output=None, error=None, base64_image=None)
-            elif action == "left_click_drag":
-                raise NotImplementedError("left_click_drag is not implemented yet")
-
-        if action in ("key", "type"):
-            if text is None:
-                raise ToolError(f"text is required for {action}")
-            if coordinate is not None:
-                raise ToolError(f"coordinate is not accepted for {action}")
-            if not isinstance(text, str):
-                raise ToolError(output=f"{text} must be a string")
-
-            if action == "key":
-                # hande shifts
-                self.press_key(text)
-                return ToolResult()
-            elif action == "type":
-                for chunk in chunks(text, TYPING_GROUP_SIZE):
-                    self.page.keyboard.type(chunk)
-                return self.screenshot()
-
-        if action in (
-            "left_click",
-            "right_click",
-            "double_click",
-            "middle_click",
-            "screenshot",
-            "cursor_position",
-        ):
-            if text is not None:
-                raise ToolError(f"text is not accepted for {action}")
-            if coordinate is not None:
-                raise ToolError(f"coordinate is not accepted for {action}")
-
-            if action == "screenshot":
-                return self.screenshot()
-            elif action == "cursor_position":
-                return ToolResult(
-                    output=f"X={self.mouse_position[0]},Y={self.mouse_position[1]}"
+        """Run an action. text, coordinate, scroll_directions, scroll_amount, duration, key are potential additional parameters."""
+        plan = plan_action(
+            self.api_type,
+            action,
+            self.to_page,
+            text=text,
+            coordinate=coordinate,
+            scroll_direction=scroll_direction,
+            scroll_amount=scroll_amount,
+            duration=duration,
+            key=key,
+        )
+        return self.execute(plan)
+
+    def execute(self, plan: ActionPlan) -> ToolResult:
+        """Run a planned action on the page, see `engine.plan_action`."""
+        if plan.position is not None:
+            if plan.move:
+                self.input.move(*plan.position)
+            self.mouse_position = plan.position
+        if plan.kind == "move":
+            return ToolResult()
+        if plan.kind == "click":
+            before = self.before_click() if self.click_feedback else None
+            self.input.click(
+                *self.mouse_position,
+                button=plan.button,
+                click_count=plan.click_count,
+                delay=plan.delay,
+                modifiers=plan.keys,
+            )
+            if before is not None:
+                return ToolResult(output=self.after_click(before))
+            return ToolResult()
+        if plan.kind == "down":
+            self.input.down(*self.mouse_position)
+            return ToolResult()
+        if plan.kind == "up":
+            self.input.up(*self.mouse_position)
+            return ToolResult()
+        if plan.kind == "scroll":
+            self.input.wheel(
+                *self.mouse_position, delta_x=plan.delta_x, delta_y=plan.delta_y
+            )
+            return ToolResult()
+        if plan.kind == "press":
+            self.input.press(cast(list[str], plan.keys))
+            return ToolResult()
+        if plan.kind == "hold_key":
+            self.page.keyboard.press(
+                cast(str, plan.chord), delay=cast(float, plan.duration) * 1000
+            )
+            return ToolResult()
+        if plan.kind == "type":
+            for chunk in plan.text or []:
+                self.page.keyboard.type(chunk)
+            return self.screenshot()
+        if plan.kind == "wait":
+            duration = cast(float, plan.duration)
+            waited, changed = self.wait_for_change(duration)
+            result = self.screenshot()
+            note = wait_note(waited, changed)
+            if self.virtual_time:
+                note = f"Advanced the page's clock by {duration:.1f}s. {note}"
+            return replace(
+                result, output=f"{note}\n{result.output}" if result.output else note
+            )
+        if plan.kind == "cursor_position":
+            x, y = self.to_model(self.mouse_position)
+            return ToolResult(output=f"X={x},Y={y}")
+        return self.screenshot()
+
+    def before_click(self) -> tuple[list | None, str]:
+        """Hit-test the mouse position and start counting DOM mutations, see `hit_test`."""
+        url = self.page.url
+        try:
+            state = self.page.evaluate(
+                CLICK_WATCH_SCRIPT, [*self.mouse_position, MAX_NAME_LENGTH]
+            )
+        except Error:
+            state = None
+        return state, url
+
+    def after_click(self, before: tuple[list | None, str]) -> str:
+        """Describe what the click hit and changed: focus, URL and DOM."""
+        self.page.wait_for_timeout(CLICK_SETTLE_MS)
+        try:
+            after = self.page.evaluate(CLICK_RESULT_SCRIPT, MAX_NAME_LENGTH)
+        except Error:
+            # The page is navigating.
+            after = None
+        return describe_click(before[0], after, before[1], self.page.url)
+
+    def screenshot(self, wait_for_load: bool = True) -> ToolResult:
+        """Observe the current screen, as an image and/or a text snapshot depending on `observation_mode`.
+
+        Args:
+            wait_for_load: Whether to wait for the page to load first, see `screenshot_wait_until`.
+        """
+        self.reduce_motion()
+        if wait_for_load:
+            if self.screenshot_wait_until is not None:
+                self.page.wait_for_load_state(
+                    self.screenshot_wait_until, timeout=self.deadline.timeout_ms()
                 )
-            else:
-                click_arg = {
-                    "left_click": {"button": "left", "click_count": 1},
-                    "right_click": {"button": "right", "click_count": 1},
-                    "middle_click": {"button": "middle", "click_count": 1},
-                    "double_click": {"button": "left", "click_count": 2, "delay": 100},
-                }[action]
-                self.page.mouse.click(
-                    self.mouse_position[0], self.mouse_position[1], **click_arg
+            self.page.wait_for_load_state(timeout=self.deadline.timeout_ms())
+        output = None
+        base64_image = None
+        if self.observation_mode in ("text", "both"):
+            output = self.snapshot()
+        if self.observation_mode in ("screenshot", "both"):
+            base64_image = self.capture()
+            size = (self.model_width, self.model_height)
+            if self.observed_size is not None and size != self.observed_size:
+                note = (
+                    f"The screen is now shown at {size[0]}x{size[1]}, use coordinates "
+                    "in this resolution."
                 )
-                return ToolResult()
+                output = f"{note}\n{output}" if output else note
+            self.observed_size = size
+        return ToolResult(
+            output=output, base64_image=base64_image, media_type=self.media_type
+        )
 
-        raise ToolError(f"Invalid action: {action}")
+    def reduce_motion(self):
+        """With virtual time, emulate prefers-reduced-motion on the page if not done yet."""
+        if self.virtual_time and not self.motion_reduced:
+            self.page.emulate_media(reduced_motion="reduce")
+            self.motion_reduced = True
 
-    def screenshot(self) -> ToolResult:
+    def snapshot(self) -> str:
+        """Text snapshot of the visible interactive elements, diffed against the previous one."""
+        elements = self.page.evaluate(SNAPSHOT_SCRIPT, MAX_NAME_LENGTH)
+        return self.text_snapshot.render(
+            self.page.url,
+            self.page.title(),
+            [format_element(element, scale=self.scale) for element in elements],
+        )
+
+    def capture(self) -> str:
         """Take a screenshot of the current screen and return the base64 encoded image."""
-        if self.screenshot_wait_until is not None:
-            self.page.wait_for_load_state(self.screenshot_wait_until)
-        screenshot = self.page.screenshot()
-        image = Image.open(io.BytesIO(screenshot))
-        img_small = image.resize((self.width, self.height), Image.LANCZOS)
+        if self.frame_cache is None:
+            return self.encode_screenshot()
+        key = self.frame_key()
+        frame = self.frame_cache.get(key)
+        if frame is None:
+            frame = self.encode_screenshot()
+            self.frame_cache.put(key, frame)
+        return frame
+
+    def frame_key(self) -> tuple | None:
+        """What the screenshot depends on, None if the page may have changed unnoticed."""
+        try:
+            state = self.page.evaluate(STATE_SCRIPT)
+        except Error:
+            return None
+        if state is None or state[1]:
+            return None
+        return (
+            state[0],
+            self.mouse_position,
+            self.width,
+            self.height,
+            self.model_width,
+            self.model_height,
+            self.image_format,
+            self.jpeg_quality,
+        )
+
+    def wait_for_change(self, duration: float) -> tuple[float, bool]:
+        """Wait until the page changes and settles, or duration elapses.
+
+        Changes are navigations, requests and the page monitor's state, or the frame
+        itself when the monitor is missing or cannot see the changes.
+
+        With virtual time, the timers due in duration fire at once first, then only
+        the requests they started are waited for: returns as soon as none is in
+        flight and the page settled.
+
+        Returns:
+            The seconds waited, and whether the page changed.
+        """
+        start = time.monotonic()
+        remaining = self.deadline.remaining()
+        if remaining is not None:
+            duration = max(min(duration, remaining - WAIT_DEADLINE_MARGIN), 0)
+        network = NetworkActivity(self.page)
+        network.attach()
+        try:
+            previous = self.change_signal()
+            if self.virtual_time:
+                self.page.clock.run_for(round(duration * 1000))
+            changed = False
+            quiet_since = start
+            while (elapsed := time.monotonic() - start) < duration:
+                self.page.wait_for_timeout(
+                    min(WAIT_POLL_INTERVAL, duration - elapsed) * 1000
+                )
+                current = self.change_signal()
+                if current != previous or network.navigated or network.started:
+                    changed = True
+                    quiet_since = time.monotonic()
+                    previous = current
+                    network.navigated = False
+                    network.started = 0
+                elif network.inflight:
+                    quiet_since = time.monotonic()
+                elif changed and time.monotonic() - quiet_since >= WAIT_SETTLE_TIME:
+                    break
+                elif self.virtual_time and not changed:
+                    # The timers already ran and nothing is loading.
+                    break
+        finally:
+            network.detach()
+        return time.monotonic() - start, changed
+
+    def change_signal(self) -> str | bytes:
+        """The page monitor's state if it sees every change, else a digest of the frame."""
+        try:
+            state = self.page.evaluate(STATE_SCRIPT)
+        except Error:
+            # The page is navigating.
+            return ""
+        if state is not None and not state[1]:
+            return state[0]
+        screenshot = self.page.screenshot(
+            scale="css",
+            animations=self.animations,
+            timeout=self.deadline.timeout_ms(),
+        )
+        return hashlib.sha1(screenshot).digest()
 
+    def encode_screenshot(self) -> str:
+        """Capture the screen, scale it to the model resolution and encode it in base64."""
+        from PIL import Image
+
+        size = (self.model_width, self.model_height)
+        # Capturing at CSS scale skips the device pixels we would downscale anyway.
+        downscale = size[0] <= self.width and size[1] <= self.height
+        screenshot = self.page.screenshot(
+            scale="css" if downscale else "device",
+            animations=self.animations,
+            timeout=self.deadline.timeout_ms(),
+        )
+        image = Image.open(io.BytesIO(screenshot))
+        img_small = image if image.size == size else image.resize(size, Image.LANCZOS)
         if self.use_cursor:
             cursor = load_cursor_image()
-            img_small.paste(cursor, self.mouse_position, cursor)
+            img_small.paste(cursor, self.to_model(self.mouse_position), cursor)
         buffered = io.BytesIO()
-        img_small.save(buffered, format="PNG")
-        base64_image = base64.b64encode(buffered.getvalue()).decode()
-        return ToolResult(base64_image=base64_image)
+        if self.image_format == "jpeg":
+            img_small.convert("RGB").save(
+                buffered, format="JPEG", quality=self.jpeg_quality
+            )
+        else:
+            img_small.save(buffered, format="PNG")
+        return base64.b64encode(buffered.getvalue()).decode()
+
+    @property
+    def animations(self) -> Literal["allow", "disabled"]:
+        """Whether screenshots let animations run, or finish them first."""
+        return "disabled" if self.virtual_time else "allow"
+
+    @property
+    def scale(self) -> tuple[float, float]:
+        """Factors converting page coordinates into model coordinates."""
+        return self.model_width / self.width, self.model_height / self.height
+
+    def to_page(self, coordinate: tuple[int, int]) -> tuple[int, int]:
+        """Map a coordinate of the model's screen to the page, at the center of its pixel."""
+        scale_x, scale_y = self.scale
+        return (
+            min(int((coordinate[0] + 0.5) / scale_x), self.width - 1),
+            min(int((coordinate[1] + 0.5) / scale_y), self.height - 1),
+        )
+
+    def to_model(self, coordinate: tuple[int, int]) -> tuple[int, int]:
+        """Map a coordinate of the page to the model's screen."""
+        scale_x, scale_y = self.scale
+        return (
+            min(int((coordinate[0] + 0.5) * scale_x), self.model_width - 1),
+            min(int((coordinate[1] + 0.5) * scale_y), self.model_height - 1),
+        )
 
     def press_key(self, key: str):
         """Press a key on the keyboard. Handle + shifts. Eg: Ctrl+Shift+T."""
-        shifts = []
-        if "+" in key:
-            shifts += key.split("+")[:-1]
-            key = key.split("+")[-1]
-        for shift in shifts:
-            self.page.keyboard.down(shift)
-        self.page.keyboard.press(to_playwright_key(key))
-        for shift in shifts:
-            self.page.keyboard.up(shift)
+        self.input.press(to_playwright_keys(key))
 
 
 class PlaywrightComputerTool20241022(BasePlaywrightComputerTool):
@@ -325,99 +1667,3 @@ class PlaywrightComputerTool20250124(BasePlaywrightComputerTool):
     def to_params(self) -> BetaToolComputerUse20250124Param:
         """Params describing the tool. Used by Claude to understand this is a computer use tool."""
         return {"name": self.name, "type": self.api_type, **self.options}
-
-    def __call__(
-        self,
-        *,
-        action: Action_20250124,
-        text: str | None = None,
-        coordinate: tuple[int, int] | None = None,
-        scroll_direction: ScrollDirection | None = None,
-        scroll_amount: int | None = None,
-        duration: int | float | None = None,
-        key: str | None = None,
-        **kwargs,
-    ):
-        """Run an action. text, coordinate, scroll_directions, scroll_amount, duration, key are potential additional parameters."""
-        if action in ("left_mouse_down", "left_mouse_up"):
-            if coordinate is not None:
-                raise ToolError(f"coordinate is not accepted for {action=}.")
-            self.page.mouse.down() if action == "left_mouse_down" else self.page.mouse.up()
-            return ToolResult()
-        if action == "scroll":
-            if scroll_direction is None or scroll_direction not in get_args(
-                ScrollDirection
-            ):
-                raise ToolError(
-                    f"{scroll_direction=} must be 'up', 'down', 'left', or 'right'"
-                )
-            if not isinstance(scroll_amount, int) or scroll_amount < 0:
-                raise ToolError(f"{scroll_amount=} must be a non-negative int")
-            if coordinate is not None:
-                x, y = coordinate
-                self.page.mouse.move(x, y)
-                self.mouse_position = (x, y)
-            scroll_amount *= SCROLL_MULTIPLIER_FACTOR
-            scroll_params = {
-                "up": {"delta_y": -scroll_amount, "delta_x": 0},
-                "down": {"delta_y": scroll_amount, "delta_x": 0},
-                "left": {"delta_y": 0, "delta_x": scroll_amount},
-                "right": {"delta_y": 0, "delta_x": -scroll_amount},
-            }[scroll_direction]
-
-            self.page.mouse.wheel(**scroll_params)
-            return ToolResult()
-
-        if action in ("hold_key", "wait"):
-            if duration is None or not isinstance(duration, (int, float)):
-                raise ToolError(f"{duration=} must be a number")
-            if duration < 0:
-                raise ToolError(f"{duration=} must be non-negative")
-            if duration > 100:
-                raise ToolError(f"{duration=} is too long.")
-
-            if action == "hold_key":
-                if text is None:
-                    raise ToolError(f"text is required for {action}")
-                self.page.keyboard.press(to_playwright_key(text), delay=duration)
-                return ToolResult()
-
-            if action == "wait":
-                sleep(duration)
-                return self.screenshot()
-
-        if action in (
-            "left_click",
-            "right_click",
-            "double_click",
-            "triple_click",
-            "middle_click",
-        ):
-            if text is not None:
-                raise ToolError(f"text is not accepted for {action}")
-            if coordinate is not None:
-                x, y = coordinate
-                self.page.mouse.move(x, y)
-                self.mouse_position = (x, y)
-
-            click_arg = {
-                "left_click": {"button": "left", "click_count": 1},
-                "right_click": {"button": "right", "click_count": 1},
-                "middle_click": {"button": "middle", "click_count": 1},
-                "double_click": {"button": "left", "click_count": 2, "delay": 10},
-                "double_click": {"button": "left", "click_count": 3, "delay": 10},
-            }[action]
-            if key:
-                self.page.keyboard.down(to_playwright_key(key))
-            self.page.mouse.click(
-                self.mouse_position[0], self.mouse_position[1], **click_arg
-            )
-            if key:
-                self.page.keyboard.up(to_playwright_key(key))
-
-            return ToolResult()
-
-        action = cast(Action_20241022, action)
-        return super().__call__(
-            action=action, text=text, coordinate=coordinate, key=key, **kwargs
-        )
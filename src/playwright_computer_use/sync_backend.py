@@ -0,0 +1,31 @@
+"""The sync counterpart of async_backend, imported by the generated sync_api.
+
+Sync calls block the caller and cannot be cancelled: there is no background work,
+and the deadline of an action only bounds each Playwright call.
+"""
+
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def require_async(feature: str):
+    """Refuse a feature needing background work or pipelined calls."""
+    raise ValueError(f"{feature} is only available in the async API")
+
+
+def with_timeout(result: T, timeout: float | None) -> T:
+    """The result of a call that already ran, bounded by its own Playwright timeouts."""
+    return result
+
+
+def gather(*results: T) -> list[T]:
+    """The results of calls that already ran, one after the other."""
+    return list(results)
+
+
+class BackgroundTasks:
+    """Nothing runs in the background, see `require_async`."""
+
+    def start(self, result: Any):
+        """The call already ran."""
@@ -0,0 +1,39 @@
+"""Helpers for the tab pool: which links to prefetch and how to recognize them."""
+
+from urllib.parse import urlsplit, urlunsplit
+
+# Visible http(s) links of the viewport, largest first, skipping the current page and
+# links with side effects. Returns at most `limit` absolute URLs.
+PREFETCH_LINKS_SCRIPT = """(limit) => {
+    const skipped = /log.?out|sign.?out|delete|remove|unsubscribe|cart|checkout/i;
+    const current = location.href.split("#")[0];
+    const links = [];
+    const seen = new Set();
+    for (const a of document.querySelectorAll("a[href]")) {
+        const href = a.href.split("#")[0];
+        if (!/^https?:/.test(href) || href === current || seen.has(href)) continue;
+        if (a.target === "_blank" || a.hasAttribute("download")) continue;
+        if (skipped.test(href) || skipped.test(a.innerText || "")) continue;
+        const r = a.getBoundingClientRect();
+        const width = Math.min(r.right, innerWidth) - Math.max(r.left, 0);
+        const height = Math.min(r.bottom, innerHeight) - Math.max(r.top, 0);
+        if (width <= 0 || height <= 0) continue;
+        seen.add(href);
+        links.push([width * height, href]);
+    }
+    return links.sort((a, b) => b[0] - a[0]).slice(0, limit).map((link) => link[1]);
+}"""
+
+
+def url_key(url: str) -> str:
+    """Key identifying the document a URL loads: no fragment, no trailing slash."""
+    parts = urlsplit(url)
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path.rstrip("/"),
+            parts.query,
+            "",
+        )
+    )
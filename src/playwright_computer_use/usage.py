@@ -0,0 +1,127 @@
+"""Token accounting of a session, and the screenshot quality its budget still allows."""
+
+import base64
+import io
+import math
+import struct
+from dataclasses import dataclass
+from typing import Any, Literal
+
+ImageFormat = Literal["png", "jpeg"]
+
+# Anthropic's estimate of the tokens of an image: width * height / 750.
+PIXELS_PER_IMAGE_TOKEN = 750
+
+# Base64 characters decoded to read the size of an image: the PNG header, and the JPEG
+# headers up to the frame as PIL writes them (quantization tables, no metadata).
+IMAGE_HEADER_BASE64_LENGTH = 1024
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Approximate number of input tokens of an image of this size."""
+    return math.ceil(width * height / PIXELS_PER_IMAGE_TOKEN)
+
+
+def image_size(base64_image: str) -> tuple[int, int]:
+    """Width and height of a base64 encoded image, decoding only its header if possible."""
+    data = base64.b64decode(base64_image[:IMAGE_HEADER_BASE64_LENGTH])
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+    if data.startswith(b"\xff\xd8"):
+        index = 2
+        while index + 9 <= len(data) and data[index] == 0xFF:
+            marker = data[index + 1]
+            # Start of frame markers, except DHT, JPG and DAC which share the range.
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[index + 5 : index + 9])
+                return width, height
+            index += 2 + struct.unpack(">H", data[index + 2 : index + 4])[0]
+    # Other formats, or headers longer than the decoded prefix.
+    from PIL import Image
+
+    with Image.open(io.BytesIO(base64.b64decode(base64_image))) as image:
+        return image.size
+
+
+def image_tokens(base64_image: str) -> int:
+    """Approximate number of input tokens of a base64 encoded image, from its header."""
+    return estimate_image_tokens(*image_size(base64_image))
+
+
+@dataclass
+class SessionUsage:
+    """Tokens used by the requests of a session, as reported by the API."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    # Estimated before sending, see `image_tokens`, part of the input tokens.
+    image_tokens: int = 0
+    requests: int = 0
+
+    def add(self, usage: Any):
+        """Add the usage of a response, e.g. `response.usage`."""
+        self.requests += 1
+        for name in (
+            "input_tokens",
+            "output_tokens",
+            "cache_read_input_tokens",
+            "cache_creation_input_tokens",
+        ):
+            setattr(self, name, getattr(self, name) + (getattr(usage, name, 0) or 0))
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens counted against a budget: input, cached or not, and output."""
+        return (
+            self.input_tokens
+            + self.output_tokens
+            + self.cache_read_input_tokens
+            + self.cache_creation_input_tokens
+        )
+
+
+@dataclass(frozen=True)
+class ImageQuality:
+    """How screenshots are sent to the model."""
+
+    # Factor applied to the resolution seen by the model.
+    scale: float = 1.0
+    image_format: ImageFormat = "png"
+    jpeg_quality: int = 85
+    # Maximum number of screenshots kept in the conversation, None keeps them all.
+    max_images: int | None = None
+
+
+# Fraction of the budget used -> quality from then on.
+DEFAULT_QUALITY_STEPS: tuple[tuple[float, ImageQuality], ...] = (
+    (0.5, ImageQuality(image_format="jpeg", jpeg_quality=80, max_images=5)),
+    (
+        0.75,
+        ImageQuality(scale=0.75, image_format="jpeg", jpeg_quality=60, max_images=3),
+    ),
+    (0.9, ImageQuality(scale=0.5, image_format="jpeg", jpeg_quality=50, max_images=1)),
+)
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    """Maximum tokens of a session, degrading screenshots as it gets close."""
+
+    max_tokens: int
+    steps: tuple[tuple[float, ImageQuality], ...] = DEFAULT_QUALITY_STEPS
+
+    def quality(self, usage: SessionUsage) -> ImageQuality:
+        """The screenshot quality allowed with what is left of the budget."""
+        used = usage.total_tokens / self.max_tokens
+        quality = ImageQuality()
+        for fraction, step in self.steps:
+            if used >= fraction:
+                quality = step
+        return quality
+
+    def exceeded(self, usage: SessionUsage) -> bool:
+        """Whether the session must stop."""
+        return usage.total_tokens >= self.max_tokens
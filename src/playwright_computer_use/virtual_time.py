@@ -0,0 +1,29 @@
+"""Scripts to let pages wait on themselves in virtual time, and hold still when observed."""
+
+# Stops CSS animations and transitions, and smooth scrolling, in every document. Run as
+# an init script: the style is added as soon as the document has a root element.
+FREEZE_ANIMATIONS_SCRIPT = """(() => {
+    const css = `*, *::before, *::after {
+        animation-delay: 0s !important;
+        animation-duration: 0s !important;
+        animation-iteration-count: 1 !important;
+        transition-delay: 0s !important;
+        transition-duration: 0s !important;
+        scroll-behavior: auto !important;
+    }`;
+    const install = () => {
+        if (document.getElementById("__playwrightComputerUseFreeze")) return true;
+        const root = document.head || document.documentElement;
+        if (!root) return false;
+        const style = document.createElement("style");
+        style.id = "__playwrightComputerUseFreeze";
+        style.textContent = css;
+        root.appendChild(style);
+        return true;
+    };
+    if (!install()) {
+        new MutationObserver((records, observer) => {
+            if (install()) observer.disconnect();
+        }).observe(document, { childList: true });
+    }
+})()"""
@@ -0,0 +1,127 @@
+"""Tests of the on-disk asset cache."""
+
+import os
+
+import pytest
+
+from playwright_computer_use.cache import AssetCache, CacheEntry
+
+
+def entry(headers: dict[str, str], stored_at: float = 1000.0) -> CacheEntry:
+    """An entry with these headers, stored at stored_at."""
+    return CacheEntry(
+        url="https://example.com/app.js",
+        status=200,
+        headers=headers,
+        stored_at=stored_at,
+        size=0,
+    )
+
+
+@pytest.mark.parametrize(
+    "headers, now, fresh",
+    [
+        ({"cache-control": "max-age=60"}, 1059, True),
+        ({"cache-control": "max-age=60"}, 1060, False),
+        ({"cache-control": "public, s-maxage=10, max-age=600"}, 1020, False),
+        ({"cache-control": "immutable"}, 10**9, True),
+        ({"cache-control": "no-cache, max-age=600"}, 1001, False),
+        ({"expires": "Thu, 01 Jan 1970 00:20:00 GMT"}, 1199, True),
+        ({"expires": "Thu, 01 Jan 1970 00:20:00 GMT"}, 1200, False),
+        ({"expires": "0"}, 1001, False),
+        ({}, 1001, False),
+    ],
+)
+def test_is_fresh(headers, now, fresh):
+    """Freshness follows Cache-Control, then Expires."""
+    assert AssetCache.is_fresh(entry(headers), now=now) is fresh
+
+
+@pytest.mark.parametrize(
+    "status, headers, cacheable",
+    [
+        (200, {}, True),
+        (200, {"vary": "Accept-Encoding"}, True),
+        (200, {"vary": "accept-encoding, Origin"}, False),
+        (200, {"vary": "Origin"}, False),
+        (200, {"vary": "*"}, False),
+        (200, {"cache-control": "no-store"}, False),
+        (200, {"cache-control": "private, max-age=60"}, False),
+        (200, {"set-cookie": "a=b"}, False),
+        (206, {}, False),
+        (304, {}, False),
+    ],
+)
+def test_is_cacheable_response(status, headers, cacheable):
+    """Only shareable responses, whose body only depends on the URL, are stored."""
+    assert AssetCache.is_cacheable_response(status, headers) is cacheable
+
+
+def test_is_cacheable_request():
+    """Only plain GET requests of static assets come from the cache."""
+    assert AssetCache.is_cacheable_request("GET", "script", {})
+    assert not AssetCache.is_cacheable_request("POST", "script", {})
+    assert not AssetCache.is_cacheable_request("GET", "document", {})
+    assert not AssetCache.is_cacheable_request("GET", "image", {"range": "bytes=0-"})
+    assert not AssetCache.is_cacheable_request(
+        "GET", "font", {"authorization": "Bearer x"}
+    )
+
+
+def test_store_and_lookup(tmp_path):
+    """Stored responses are found again, without the transfer headers."""
+    cache = AssetCache(str(tmp_path))
+    url = "https://example.com/app.js"
+    assert cache.lookup(url) is None
+    headers = {"etag": '"v1"', "content-encoding": "gzip", "content-length": "3"}
+    stored = cache.store(url, 200, headers, b"abc")
+    assert stored is not None
+    found = cache.lookup(url)
+    assert found == stored
+    assert found.headers == {"etag": '"v1"'}
+    assert cache.read(found) == b"abc"
+    assert cache.validators(found) == {"if-none-match": '"v1"'}
+    assert cache.store(url, 200, {"vary": "Origin"}, b"abc") is None
+
+
+def test_refresh(tmp_path):
+    """A 304 response updates the stored headers and age."""
+    cache = AssetCache(str(tmp_path))
+    url = "https://example.com/app.js"
+    stored = cache.store(url, 200, {"cache-control": "max-age=60"}, b"abc")
+    stored.stored_at = 0
+    cache.refresh(stored, {"cache-control": "max-age=600", "content-length": "0"})
+    found = cache.lookup(url)
+    assert found.headers == {"cache-control": "max-age=600"}
+    assert found.stored_at > 0
+    assert cache.is_fresh(found)
+
+
+def test_lru_eviction(tmp_path):
+    """Least recently used entries are evicted once the cache is full."""
+    cache = AssetCache(str(tmp_path), max_bytes=10)
+    cache.store("https://example.com/a", 200, {}, b"aaaa")
+    cache.store("https://example.com/b", 200, {}, b"bbbb")
+    # Using a makes b the least recently used.
+    assert cache.lookup("https://example.com/a") is not None
+    cache.store("https://example.com/c", 200, {}, b"cccc")
+    assert cache.lookup("https://example.com/b") is None
+    assert cache.lookup("https://example.com/a") is not None
+    assert cache.lookup("https://example.com/c") is not None
+    assert len(os.listdir(tmp_path)) == 4
+    # Larger than the whole cache.
+    assert cache.store("https://example.com/d", 200, {}, b"d" * 11) is None
+
+
+def test_reopen_evicts(tmp_path):
+    """A cache opened on an existing directory reuses and bounds its assets."""
+    cache = AssetCache(str(tmp_path))
+    for name in "abc":
+        cache.store(f"https://example.com/{name}", 200, {}, b"1234")
+    reopened = AssetCache(str(tmp_path), max_bytes=8)
+    kept = [
+        name
+        for name in "abc"
+        if reopened.lookup(f"https://example.com/{name}") is not None
+    ]
+    assert len(kept) == 2
@@ -0,0 +1,61 @@
+"""Tests of the conversion of xdotool key names into Playwright ones."""
+
+import pytest
+
+from playwright_computer_use.keys import (
+    XDOTOOL_TO_PLAYWRIGHT_KEYS,
+    to_playwright_chord,
+    to_playwright_key,
+    to_playwright_keys,
+)
+
+
+@pytest.mark.parametrize(
+    "key, expected",
+    [
+        ("Return", "Enter"),
+        ("KP_Enter", "NumpadEnter"),
+        ("ctrl", "Control"),
+        ("super_l", "Meta"),
+        ("Page_Down", "PageDown"),
+        ("BackSpace", "Backspace"),
+        ("F12", "F12"),
+        ("KP_5", "Numpad5"),
+        ("KP_Home", "Numpad7"),
+        ("minus", "-"),
+        ("a", "a"),
+        ("KeyA", "KeyA"),
+    ],
+)
+def test_to_playwright_key(key, expected):
+    """Keysyms are converted, single characters and Playwright names kept."""
+    assert to_playwright_key(key) == expected
+
+
+def test_only_us_layout_names():
+    """Keys missing from Playwright's US keyboard layout are not produced."""
+    names = set(XDOTOOL_TO_PLAYWRIGHT_KEYS.values())
+    assert not {"F13", "F24", "NumpadEqual"} & names
+    assert "f13" not in XDOTOOL_TO_PLAYWRIGHT_KEYS
+    assert "kp_equal" not in XDOTOOL_TO_PLAYWRIGHT_KEYS
+
+
+@pytest.mark.parametrize(
+    "chord, expected",
+    [
+        ("ctrl+shift+t", ["Control", "Shift", "T"]),
+        ("ctrl+c", ["Control", "c"]),
+        ("ctrl++", ["Control", "+"]),
+        ("+", ["+"]),
+        ("alt + Tab", ["Alt", "Tab"]),
+        ("Return", ["Enter"]),
+    ],
+)
+def test_to_playwright_keys(chord, expected):
+    """Chords are split on "+", which can itself be the pressed key."""
+    assert to_playwright_keys(chord) == expected
+
+
+def test_to_playwright_chord():
+    """The chord string is accepted by keyboard.press."""
+    assert to_playwright_chord("ctrl+shift+t") == "Control+Shift+T"
@@ -0,0 +1,57 @@
+"""Tests of the normalization of the URLs typed by the model."""
+
+import pytest
+
+from playwright_computer_use.navigation import is_same_url, normalize_url
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("Example.com", "https://example.com/"),
+        ("  example.com/Path?q=1#top ", "https://example.com/Path?q=1#top"),
+        ("HTTPS://EXAMPLE.com:443", "https://example.com/"),
+        ("http://example.com:80/a", "http://example.com/a"),
+        ("http://example.com:8080/a", "http://example.com:8080/a"),
+        ("localhost:8080", "https://localhost:8080/"),
+        ("localhost:8080/path", "https://localhost:8080/path"),
+        ("https://user:pw@Example.com/", "https://user:pw@example.com/"),
+    ],
+)
+def test_normalize_url(url, expected):
+    """The scheme is added, host case and default ports removed."""
+    assert normalize_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("http://[::1]:8080/", "http://[::1]:8080/"),
+        ("https://[2001:DB8::1]:443/a", "https://[2001:db8::1]/a"),
+        ("[::1]", "https://[::1]/"),
+    ],
+)
+def test_normalize_ipv6(url, expected):
+    """IPv6 hosts keep their brackets."""
+    assert normalize_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["mailto:someone@example.com", "javascript:void(0)", "about:blank", "data:,x"],
+)
+def test_normalize_scheme_only(url):
+    """URLs of other schemes are kept as they are."""
+    assert normalize_url(url) == url
+
+
+def test_invalid_port():
+    """A URL with an invalid port is kept as it is."""
+    assert normalize_url("https://example.com:99999/") == "https://example.com:99999/"
+
+
+def test_is_same_url():
+    """URLs differing only by their normalization are the same page."""
+    assert is_same_url("example.com", "https://EXAMPLE.com:443/")
+    assert not is_same_url("example.com/#a", "example.com/#b")
+    assert not is_same_url("http://example.com/", "https://example.com/")
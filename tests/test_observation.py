@@ -0,0 +1,109 @@
+"""Tests of the text snapshots and their diffs."""
+
+from playwright_computer_use.observation import TextSnapshot, format_element
+
+URL = "https://example.com/"
+
+
+def test_format_element_scales_coordinates():
+    """Coordinates are converted into the ones used by the model."""
+    element = ["textbox", "Search", "shoes", "focused", 100, 50]
+    assert format_element(element, (0.5, 2.0)) == (
+        'textbox "Search" value="shoes" [focused] @ (50, 100)'
+    )
+    assert format_element(["img", "", "", "", 1, 2]) == "img @ (1, 2)"
+
+
+def test_first_snapshot_is_full():
+    """The first snapshot of a page lists every element."""
+    snapshot = TextSnapshot()
+    text = snapshot.render(URL, "Example", ["a", "b"])
+    assert text.splitlines() == [
+        f"Page: Example ({URL})",
+        'Visible interactive elements (role "name" @ (x, y)):',
+        "a",
+        "b",
+    ]
+
+
+def test_unchanged_page():
+    """A page that did not change is not listed again."""
+    snapshot = TextSnapshot()
+    snapshot.render(URL, "", ["a", "b"])
+    assert snapshot.render(URL, "", ["a", "b"]) == (
+        f"Page: {URL}\nNo changes since the last snapshot."
+    )
+
+
+def test_diff():
+    """Later snapshots of the same page only list what changed."""
+    snapshot = TextSnapshot()
+    snapshot.render(URL, "", ["a", "b", "c", "d"])
+    text = snapshot.render(URL, "", ["a", "b", "c", "e"])
+    assert text.splitlines()[1:] == [
+        "Changes since the last snapshot (- removed, + added):",
+        "- d",
+        "+ e",
+    ]
+    assert snapshot.known == ["a", "b", "c", "e"]
+
+
+def test_large_change_is_full():
+    """A diff as long as the listing is sent as a full listing."""
+    snapshot = TextSnapshot()
+    snapshot.render(URL, "", ["a", "b"])
+    text = snapshot.render(URL, "", ["c", "d"])
+    assert "Visible interactive elements" in text
+    assert text.splitlines()[-2:] == ["c", "d"]
+
+
+def test_other_url_is_full():
+    """Navigating to another page sends the full listing."""
+    snapshot = TextSnapshot()
+    snapshot.render(URL, "", ["a", "b", "c"])
+    text = snapshot.render("https://example.org/", "", ["a", "b", "c"])
+    assert "Visible interactive elements" in text
+
+
+def test_reset():
+    """After a reset, the next snapshot is sent in full."""
+    snapshot = TextSnapshot()
+    snapshot.render(URL, "", ["a", "b"])
+    snapshot.reset()
+    assert "Visible interactive elements" in snapshot.render(URL, "", ["a", "b"])
+
+
+def test_budget_continuation():
+    """Elements cut by the token budget are listed by the next snapshots."""
+    lines = [f"button {i:02}" for i in range(10)]
+    # Room for the header and three lines.
+    snapshot = TextSnapshot(token_budget=15)
+    first = snapshot.render(URL, "", lines)
+    listed = snapshot.known
+    assert listed == lines[:3]
+    assert first.endswith(
+        f"... {len(lines) - len(listed)} more elements omitted (token budget reached)"
+    )
+
+    seen = list(listed)
+    for _ in range(len(lines)):
+        if len(seen) == len(lines):
+            break
+        text = snapshot.render(URL, "", lines)
+        assert "continuing the last listing" in text
+        seen = list(snapshot.known)
+    assert sorted(seen) == lines
+    assert snapshot.render(URL, "", lines).endswith(
+        "No changes since the last snapshot."
+    )
+
+
+def test_header_over_budget():
+    """Each snapshot lists at least one element, even if the header exceeds the budget."""
+    lines = ["a", "b", "c"]
+    snapshot = TextSnapshot(token_budget=1)
+    snapshot.render(URL, "A long title", lines)
+    assert snapshot.known == ["a"]
+    snapshot.render(URL, "A long title", lines)
+    snapshot.render(URL, "A long title", lines)
+    assert snapshot.known == lines
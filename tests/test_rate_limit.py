@@ -0,0 +1,208 @@
+"""Tests of the shared rate limits, on a fake clock."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from anthropic import APIConnectionError, APIStatusError
+
+from playwright_computer_use import rate_limit
+from playwright_computer_use.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    estimate_request_tokens,
+)
+
+
+class FakeClock:
+    """Stands for the time module, sleeping advances the time instantly."""
+
+    def __init__(self):
+        """Create a new FakeClock."""
+        self.now = 1000.0
+
+    def time(self) -> float:
+        """Current time."""
+        return self.now
+
+    def monotonic(self) -> float:
+        """Current time."""
+        return self.now
+
+    async def sleep(self, delay: float):
+        """Advance the time by delay, letting other tasks run."""
+        self.now += delay
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    """Replace the time and sleeps of the rate limiter with a fake clock."""
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    monkeypatch.setattr(
+        rate_limit,
+        "asyncio",
+        SimpleNamespace(sleep=clock.sleep, to_thread=asyncio.to_thread),
+    )
+    return clock
+
+
+def status_error(status: int, headers: dict[str, str] | None = None) -> APIStatusError:
+    """An error response of the API."""
+    response = SimpleNamespace(request=None, status_code=status, headers=headers or {})
+    return APIStatusError("error", response=response, body=None)
+
+
+def test_token_bucket(clock):
+    """Buckets refill continuously up to their capacity."""
+    bucket = TokenBucket(60)
+    assert bucket.wait_time(60) == 0
+    bucket.level = 0
+    assert bucket.wait_time(30) == 30
+    bucket.refill(clock.now + 10)
+    assert bucket.level == 10
+    bucket.refill(clock.now + 1000)
+    assert bucket.level == 60
+    # Larger than the bucket, goes through once it is full.
+    assert bucket.wait_time(600) == 0
+
+
+def test_acquire_waits_for_requests(clock):
+    """Requests over the limit wait until the bucket refilled."""
+    limiter = RateLimiter(requests_per_minute=2)
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire()
+
+    asyncio.run(run())
+    assert clock.now - 1000 == pytest.approx(30, abs=0.1)
+    stats = limiter.metrics()["queue_wait"]["interactive"]
+    assert stats["requests"] == 3
+    assert stats["max"] == pytest.approx(30, abs=0.1)
+
+
+def test_acquire_waits_for_tokens(clock):
+    """Requests wait until their input tokens are available."""
+    limiter = RateLimiter(input_tokens_per_minute=1200)
+
+    async def run():
+        await limiter.acquire(tokens=1200)
+        await limiter.acquire(tokens=600)
+
+    asyncio.run(run())
+    assert clock.now - 1000 == pytest.approx(30, abs=0.1)
+
+
+def test_priorities(clock):
+    """Interactive requests go before the batch requests queued before them."""
+    limiter = RateLimiter(requests_per_minute=1)
+    order = []
+
+    async def request(name, priority):
+        await limiter.acquire(priority=priority)
+        order.append(name)
+
+    async def run():
+        await limiter.acquire()
+        batch = asyncio.ensure_future(request("batch", "batch"))
+        await asyncio.sleep(0)
+        await request("interactive", "interactive")
+        await batch
+
+    asyncio.run(run())
+    assert order == ["interactive", "batch"]
+
+
+def test_settle(clock):
+    """Estimated tokens are corrected with the actual usage."""
+    limiter = RateLimiter(input_tokens_per_minute=1000)
+    asyncio.run(limiter.acquire(tokens=500))
+    assert limiter.tokens.level == 500
+    usage = SimpleNamespace(input_tokens=100, cache_creation_input_tokens=100)
+    limiter.settle(500, usage)
+    assert limiter.tokens.level == 800
+    limiter.settle(500, SimpleNamespace(input_tokens=0))
+    assert limiter.tokens.level == 1000
+    limiter.settle(0, SimpleNamespace(input_tokens=1500))
+    assert limiter.tokens.level == -500
+
+
+def test_backoff(monkeypatch):
+    """Backoff honors retry-after, and is jittered and capped otherwise."""
+    limiter = RateLimiter(base_delay=1, max_delay=10)
+    assert limiter.backoff(0, retry_after=3) == 3
+    assert limiter.backoff(0, retry_after=30) == 10
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: high)
+    assert [limiter.backoff(attempt) for attempt in range(5)] == [1, 2, 4, 8, 10]
+
+
+def test_call_retries_rate_limits(clock):
+    """Rate limit errors are retried after retry-after, pausing the queue."""
+    limiter = RateLimiter(requests_per_minute=100)
+    errors = [status_error(429, {"retry-after": "5"})]
+
+    def create():
+        if errors:
+            raise errors.pop()
+        return "response"
+
+    asyncio.run(limiter.call(create))
+    assert limiter.retries == 1
+    assert limiter.rate_limited == 1
+    assert limiter.paused_until == pytest.approx(1005)
+    assert clock.now >= 1005
+
+
+def test_call_retries_connection_errors(clock, monkeypatch):
+    """Transient errors are retried max_retries times, then raised."""
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: high)
+    limiter = RateLimiter(max_retries=2, base_delay=1)
+    attempts = []
+
+    def create():
+        attempts.append(clock.now)
+        raise APIConnectionError(request=None)
+
+    with pytest.raises(APIConnectionError):
+        asyncio.run(limiter.call(create))
+    assert [attempt - 1000 for attempt in attempts] == [0, 1, 3]
+    assert limiter.rate_limited == 0
+
+
+def test_call_raises_client_errors(clock):
+    """Errors that would fail again are not retried."""
+    limiter = RateLimiter()
+
+    def create():
+        raise status_error(400)
+
+    with pytest.raises(APIStatusError):
+        asyncio.run(limiter.call(create))
+    assert limiter.retries == 0
+
+
+def test_shared_state(clock, tmp_path):
+    """Limiters sharing a state file share their limits."""
+    path = str(tmp_path / "limits.json")
+    first = RateLimiter(requests_per_minute=1, state_path=path)
+    second = RateLimiter(requests_per_minute=1, state_path=path)
+    asyncio.run(first.acquire())
+    asyncio.run(second.acquire())
+    assert clock.now - 1000 == pytest.approx(60, abs=0.1)
+    # Longer than the wait for the requests bucket.
+    first.pause(90)
+    asyncio.run(second.acquire())
+    assert clock.now - 1000 == pytest.approx(150, abs=0.1)
+
+
+def test_estimate_request_tokens():
+    """Text is counted from its length, images from their size."""
+    text = estimate_request_tokens([{"role": "user", "content": "x" * 400}])
+    assert 100 < text < 120
+    # A 750 x 2 PNG header, the image data is not needed.
+    png = "iVBORw0KGgoAAAANSUhEUgAAAu4AAAACCAYAAAA="
+    image = {"type": "image", "source": {"type": "base64", "data": png}}
+    with_image = estimate_request_tokens([{"role": "user", "content": [image]}])
+    assert 2 < with_image < 2 + 30
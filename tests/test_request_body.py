@@ -0,0 +1,149 @@
+"""Tests of the incremental serialization of request bodies."""
+
+import gzip
+import json
+
+from playwright_computer_use.request_body import RequestBodyBuilder
+
+
+def screenshot(data: str) -> dict:
+    """An image block."""
+    return {
+        "type": "image",
+        "source": {"type": "base64", "media_type": "image/png", "data": data},
+    }
+
+
+def history() -> list[dict]:
+    """A short conversation with screenshots."""
+    return [
+        {"role": "user", "content": "Open example.com"},
+        {
+            "role": "assistant",
+            "content": [{"type": "text", "text": "Taking a screenshot."}],
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": "toolu_1",
+                    "content": [screenshot("aGVsbG8=")],
+                }
+            ],
+        },
+    ]
+
+
+def build(builder: RequestBodyBuilder, messages: list, **params) -> dict:
+    """The decoded body built for messages."""
+    body = builder.build(messages, **params)
+    if builder.compress_level is not None:
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def test_body():
+    """The body holds the params and the messages."""
+    messages = history()
+    builder = RequestBodyBuilder()
+    assert build(builder, messages, model="m", max_tokens=10) == {
+        "model": "m",
+        "max_tokens": 10,
+        "messages": messages,
+    }
+    assert build(builder, []) == {"messages": []}
+    assert builder.headers == {"Content-Type": "application/json"}
+
+
+def test_unchanged_messages_are_reused():
+    """Only the new messages of a growing history are serialized."""
+    messages = history()
+    builder = RequestBodyBuilder()
+    build(builder, messages)
+    assert (builder.serialized, builder.reused) == (3, 0)
+    messages.append({"role": "assistant", "content": "Done."})
+    assert build(builder, messages)["messages"] == messages
+    assert (builder.serialized, builder.reused) == (4, 3)
+
+
+def test_replaced_values_are_detected():
+    """Values replaced in a cached message serialize it again."""
+    messages = history()
+    builder = RequestBodyBuilder()
+    build(builder, messages)
+    messages[1]["content"][0]["text"] = "Clicking."
+    assert build(builder, messages)["messages"] == messages
+    # Moving the cache breakpoint, as sampling_loop does.
+    messages[1]["content"][0]["cache_control"] = {"type": "ephemeral"}
+    assert build(builder, messages)["messages"] == messages
+    del messages[1]["content"][0]["cache_control"]
+    assert build(builder, messages)["messages"] == messages
+    # Removing an old screenshot.
+    messages[2]["content"][0]["content"] = []
+    assert build(builder, messages)["messages"] == messages
+
+
+def test_mutated_containers_are_detected():
+    """Lists and dicts of a cached message mutated in place serialize it again."""
+    messages = history()
+    builder = RequestBodyBuilder()
+    build(builder, messages)
+    blocks = messages[2]["content"][0]["content"]
+    blocks.append(screenshot("d29ybGQ="))
+    assert build(builder, messages)["messages"] == messages
+    blocks.reverse()
+    assert build(builder, messages)["messages"] == messages
+    blocks.pop()
+    assert build(builder, messages)["messages"] == messages
+    blocks[0]["source"].update(data="aGVsbG8=")
+    assert build(builder, messages)["messages"] == messages
+
+
+def test_moved_objects_are_detected():
+    """An object moved into an empty container keeps no stale JSON."""
+    inner: list = []
+    block = {"type": "text", "text": "x"}
+    messages = [{"role": "user", "content": [inner, block]}]
+    builder = RequestBodyBuilder()
+    build(builder, messages)
+    messages[0]["content"].remove(block)
+    inner.append(block)
+    assert build(builder, messages)["messages"] == messages
+
+    source: dict = {}
+    message = {"role": "user", "content": {"a": source, "b": "x"}}
+    build(builder, [message])
+    source["b"] = message["content"].pop("b")
+    assert build(builder, [message])["messages"] == [message]
+
+
+def test_replaced_messages_are_detected():
+    """A message replaced by an equal looking new one is serialized again."""
+    messages = history()
+    builder = RequestBodyBuilder()
+    build(builder, messages)
+    messages[0] = {"role": "user", "content": "Open example.org"}
+    assert build(builder, messages)["messages"] == messages
+    assert builder.serialized == 4
+
+
+def test_forgets_dropped_messages():
+    """Messages no longer sent are not kept."""
+    messages = history()
+    builder = RequestBodyBuilder()
+    build(builder, messages)
+    build(builder, messages[:1])
+    assert len(builder._fragments) == 1
+
+
+def test_gzip():
+    """Compressed bodies decompress to the same JSON, reusing cached members."""
+    messages = history()
+    builder = RequestBodyBuilder(compress_level=6)
+    assert builder.headers["Content-Encoding"] == "gzip"
+    assert build(builder, messages, model="m") == {"model": "m", "messages": messages}
+    messages.append({"role": "assistant", "content": "Done."})
+    messages[1]["content"][0]["text"] = "Clicking."
+    assert build(builder, messages, model="m") == {"model": "m", "messages": messages}
+    assert (builder.serialized, builder.reused) == (5, 2)
@@ -0,0 +1,105 @@
+"""Tests of the detection of stuck sessions."""
+
+from playwright_computer_use.stall import StallDetector, screen_fingerprint
+
+
+def click(x: int) -> list[dict]:
+    """Assistant content clicking at (x, 0)."""
+    return [
+        {"type": "text", "text": "Clicking."},
+        {
+            "type": "tool_use",
+            "id": f"toolu_{x}",
+            "name": "computer",
+            "input": {"action": "left_click", "coordinate": [x, 0]},
+        },
+    ]
+
+
+def screen(data: str) -> list[dict]:
+    """Tool results showing a screenshot."""
+    return [
+        {
+            "type": "tool_result",
+            "tool_use_id": "toolu",
+            "content": [
+                {"type": "text", "text": "Clicked."},
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": "image/png",
+                        "data": data,
+                    },
+                },
+            ],
+        }
+    ]
+
+
+def test_screen_fingerprint():
+    """The fingerprint is the one of the last screenshot."""
+    assert screen_fingerprint([]) is None
+    assert screen_fingerprint([{"type": "tool_result", "content": "text"}]) is None
+    assert screen_fingerprint(screen("a")) == screen_fingerprint(screen("a"))
+    assert screen_fingerprint(screen("a")) != screen_fingerprint(screen("b"))
+    assert screen_fingerprint(screen("a") + screen("b")) == screen_fingerprint(
+        screen("b")
+    )
+
+
+def test_cycle():
+    """The same actions leading to the same screen stall after max_repeats times."""
+    detector = StallDetector(max_repeats=3)
+    assert detector.observe(click(1), screen("a")) is None
+    assert detector.observe(click(1), screen("a")) is None
+    stall = detector.observe(click(1), screen("a"))
+    assert stall is not None
+    assert stall.kind == "cycle"
+    assert stall.turn == 3
+    assert detector.stalls == [stall]
+    assert stall.reason in detector.hint_text(stall)
+    # Counting starts over after a stall.
+    assert detector.observe(click(1), screen("a")) is None
+
+
+def test_cycle_ignores_turns_without_screenshot():
+    """Turns without a screenshot neither count nor break a streak."""
+    detector = StallDetector(max_repeats=2)
+    assert detector.observe(click(1), screen("a")) is None
+    assert detector.observe(click(1), []) is None
+    assert detector.observe(click(1), screen("a")).turn == 3
+
+
+def test_different_actions_do_not_cycle():
+    """Different actions on the same screen are not a cycle."""
+    detector = StallDetector(max_repeats=2, max_no_progress=100)
+    for x in range(10):
+        assert detector.observe(click(x), screen("a")) is None
+
+
+def test_no_progress():
+    """Turns only showing screens already seen stall after max_no_progress turns."""
+    detector = StallDetector(max_repeats=100, max_no_progress=3)
+    assert detector.observe(click(0), screen("a")) is None
+    assert detector.observe(click(1), screen("b")) is None
+    assert detector.observe(click(2), screen("a")) is None
+    assert detector.observe(click(3), screen("b")) is None
+    stall = detector.observe(click(4), screen("a"))
+    assert stall is not None
+    assert stall.kind == "no_progress"
+    assert stall.as_dict() == {
+        "kind": "no_progress",
+        "reason": "the last 3 turns showed no new screen",
+        "turn": 5,
+    }
+
+
+def test_new_screen_is_progress():
+    """A new screen resets the turns without progress."""
+    detector = StallDetector(max_repeats=100, max_no_progress=2)
+    detector.observe(click(0), screen("a"))
+    detector.observe(click(1), screen("a"))
+    assert detector.observe(click(2), screen("b")) is None
+    assert detector.observe(click(3), screen("b")) is None
+    assert detector.observe(click(4), screen("a")).kind == "no_progress"
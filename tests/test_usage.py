@@ -0,0 +1,51 @@
+"""Tests of the token accounting of images."""
+
+import base64
+import io
+import sys
+
+import pytest
+from PIL import Image
+
+from playwright_computer_use.usage import (
+    IMAGE_HEADER_BASE64_LENGTH,
+    estimate_image_tokens,
+    image_size,
+    image_tokens,
+)
+
+
+def encode(size: tuple[int, int], format: str, **params) -> str:
+    """A base64 encoded image of this size and format."""
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 64).convert("RGB").save(buffer, format=format, **params)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+@pytest.mark.parametrize("format", ["PNG", "JPEG", "WEBP", "GIF"])
+def test_image_size(format):
+    """The size is read from the image, whatever its format."""
+    assert image_size(encode((321, 123), format)) == (321, 123)
+
+
+@pytest.mark.parametrize("format", ["PNG", "JPEG"])
+def test_image_size_from_header(format, monkeypatch):
+    """PNG and JPEG sizes are read from the start of the image, without PIL."""
+    image = encode((1280, 800), format)
+    assert len(image) > IMAGE_HEADER_BASE64_LENGTH
+    monkeypatch.setitem(sys.modules, "PIL", None)
+    assert image_size(image[:IMAGE_HEADER_BASE64_LENGTH]) == (1280, 800)
+
+
+def test_jpeg_with_metadata():
+    """JPEG headers longer than the decoded prefix are read in full."""
+    image = encode((64, 48), "JPEG", comment=b"x" * 2000)
+    assert image_size(image) == (64, 48)
+
+
+def test_image_tokens():
+    """Images cost width * height / 750 tokens, rounded up."""
+    assert estimate_image_tokens(1280, 800) == 1366
+    assert image_tokens(encode((1280, 800), "PNG")) == 1366
+    assert image_tokens(encode((750, 1), "JPEG")) == 1
+    assert image_tokens(encode((751, 1), "JPEG")) == 2